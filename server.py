@@ -1,12 +1,14 @@
-import os, subprocess, threading, time, signal, pathlib, re, uuid, asyncio, queue
-from urllib.request import urlopen, Request as UrlRequest
-from urllib.error import URLError
-from fastapi import FastAPI, Request, HTTPException
+import os, subprocess, threading, time, signal, re, uuid, asyncio, itertools, functools, shutil, json, fcntl, queue, hashlib, select
+import logging, logging.handlers
+import concurrent.futures
+import httpx
+from fastapi import FastAPI, HTTPException
 from fastapi.responses import JSONResponse, PlainTextResponse, RedirectResponse, StreamingResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.staticfiles import StaticFiles
-from pydantic import BaseModel
-from typing import Dict, Set
+from pydantic import BaseModel, model_validator
+from typing import Dict, Tuple
+from collections import OrderedDict, deque
 import zmq
 
 app = FastAPI()
@@ -20,6 +22,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Error reports go through a queue so the stderr write happens on the listener
+# thread. QueueHandler.prepare() still formats the record (traceback included)
+# in the calling thread; only the stream write moves off the event loop.
+log = logging.getLogger("multiview")
+log.propagate = False
+_LOG_QUEUE = queue.SimpleQueue()
+log.addHandler(logging.handlers.QueueHandler(_LOG_QUEUE))
+_LOG_LISTENER = logging.handlers.QueueListener(_LOG_QUEUE, logging.StreamHandler())
+
 OUTDIR = "/out"
 os.makedirs(OUTDIR, exist_ok=True)
 
@@ -29,17 +40,23 @@ DEFAULT_UA = os.getenv("DEFAULT_UA", "Mozilla/5.0 (Windows NT 10.0; Win64; x64)
 SOURCE_HEADERS = os.getenv("SOURCE_HEADERS", "")
 AUDIO_SOURCE = int(os.getenv("AUDIO_SOURCE", "0"))     # 0=IN1, 1=IN2, 2=mix
 ENCODER_PREFERENCE = os.getenv("ENCODER_PREFERENCE", "auto").lower()
+CUDA_FILTERS = os.getenv("CUDA_FILTERS", "0") == "1"  # Decode + composite on the GPU when NVENC is selected
+X264_THREADS = int(os.getenv("X264_THREADS", "4"))  # libx264 encoder threads (0 = one per host CPU)
+FAST_RESTART = os.getenv("FAST_RESTART", "0") == "1"  # Probe inputs briefly so (re)starts show video sooner
+LIVE_VOLUME = os.getenv("LIVE_VOLUME", "1") == "1"  # Change volume over ZMQ without restarting FFmpeg
 INSET_SCALE = int(os.getenv("INSET_SCALE", "640"))
 INSET_MARGIN = int(os.getenv("INSET_MARGIN", "40"))
+PIPE_SIZE = int(os.getenv("PIPE_SIZE", str(1024 * 1024)))  # FFmpeg stdout pipe buffer (bytes)
+THREAD_POOL_SIZE = int(os.getenv("THREAD_POOL_SIZE", "8"))  # Workers for blocking calls run via asyncio.to_thread
+LAYOUT_DEBOUNCE_SEC = int(os.getenv("LAYOUT_DEBOUNCE_MS", "300")) / 1000  # Coalesce bursts of layout changes
 STANDBY_LABEL = os.getenv("STANDBY_LABEL", "Standby")
 HLS_TIME = os.getenv("HLS_TIME", "1")
 HLS_LIST_SIZE = os.getenv("HLS_LIST_SIZE", "8")
 HLS_DELETE_THRESHOLD = os.getenv("HLS_DELETE_THRESHOLD", "2")
 FONT = os.getenv("FONT", "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf")
+ENABLE_HLS_MOUNT = os.getenv("ENABLE_HLS_MOUNT", "0") == "1"  # Serve OUTDIR at /hls
 M3U_SOURCE = os.getenv("M3U_SOURCE", "http://127.0.0.1:9191/output/m3u?direct=true")
-# Stream file size limit (in bytes) - restart FFmpeg when exceeded
-# Default: 500MB to prevent unbounded growth
-MAX_STREAM_SIZE = int(os.getenv("MAX_STREAM_SIZE", str(500 * 1024 * 1024)))
+ENCODER_PROBE_CACHE = os.getenv("ENCODER_PROBE_CACHE", "/tmp/mv_encoder_probe.json")  # "" disables
 # ------------------------------------------------
 
 # ========== Hardware Encoder Detection ==========
@@ -87,6 +104,8 @@ ENCODER_CONFIGS = {
         'test_args': ['-f', 'lavfi', '-i', 'nullsrc=s=256x256:d=0.1', '-c:v', 'libx264', '-f', 'null', '-'],
         'encode_args': [
             "-c:v", "libx264",
+            # Cap threads: x264 sizes itself to the host's CPUs, not the container's share
+            *(("-threads", str(X264_THREADS)) if X264_THREADS > 0 else ()),
             "-preset", "veryfast", "-tune", "zerolatency",
             "-b:v", "6000k", "-maxrate", "6500k", "-bufsize", "12M",
             "-pix_fmt", "yuv420p", "-r", "30", "-g", "60",
@@ -94,52 +113,158 @@ ENCODER_CONFIGS = {
     }
 }
 
-def test_encoder(encoder_type: str) -> bool:
+def missing_encoder_device(encoder_type: str) -> str | None:
     """
-    Test if a specific encoder is available and functional.
+    Check for the device node a hardware encoder can't work without.
+
+    A stat is far cheaper than letting FFmpeg fail to open the device.
+
+    Returns:
+        The missing device path, or None if present (or not needed)
+    """
+    if encoder_type == 'nvidia':
+        # The container toolkit mounts /dev/nvidiactl plus /dev/nvidia<N> by host
+        # minor number, so a container given only GPU 1 has no /dev/nvidia0.
+        # WSL2 exposes the GPU as /dev/dxg instead of /dev/nvidia*
+        if os.path.exists('/dev/nvidiactl') or os.path.exists('/dev/dxg'):
+            return None
+        try:
+            if any(name.startswith('nvidia') and name[6:].isdigit() for name in os.listdir('/dev')):
+                return None
+        except OSError:
+            pass
+        return '/dev/nvidia*'
+    if encoder_type == 'amd':
+        return None if os.path.exists('/dev/dri/renderD128') else '/dev/dri/renderD128'
+    if encoder_type == 'intel':
+        try:
+            if any(name.startswith('renderD') for name in os.listdir('/dev/dri')):
+                return None
+        except OSError:
+            pass
+        return '/dev/dri/renderD*'
+    return None
+
+def run_encoder_probe(encoder_type: str) -> str | None:
+    """
+    Run a quick null-output encode with one encoder.
+
+    Prints nothing, so several probes can run side by side.
 
     Args:
         encoder_type: One of 'nvidia', 'intel', 'amd', 'cpu'
 
     Returns:
-        True if encoder works, False otherwise
+        None if the encoder works, otherwise a short failure description
     """
-    if encoder_type not in ENCODER_CONFIGS:
-        return False
+    missing_device = missing_encoder_device(encoder_type)
+    if missing_device:
+        return f"skipped: {missing_device} not present"
 
     config = ENCODER_CONFIGS[encoder_type]
-    print(f"  Testing {config['name']} ({config['codec']})...")
-
     try:
-        # Run a quick encoding test with null output
         result = subprocess.run(
             ['ffmpeg', '-hide_banner', '-loglevel', 'error'] + config['test_args'],
-            capture_output=True,
+            stdout=subprocess.DEVNULL,  # only stderr is reported on failure
+            stderr=subprocess.PIPE,
             timeout=5
         )
-
-        if result.returncode == 0:
-            print(f"    ✓ {config['name']} is available and functional")
-            return True
-        else:
-            error_msg = result.stderr.decode('utf-8', errors='ignore').strip()
-            print(f"    ✗ {config['name']} test failed: {error_msg[:100]}")
-            return False
-
     except subprocess.TimeoutExpired:
-        print(f"    ✗ {config['name']} test timed out")
-        return False
+        return "test timed out"
     except FileNotFoundError:
-        print(f"    ✗ FFmpeg not found")
-        return False
+        return "test failed: FFmpeg not found"
     except Exception as e:
-        print(f"    ✗ {config['name']} test error: {e}")
+        return f"test error: {e}"
+
+    if result.returncode == 0:
+        return None
+    error_msg = result.stderr.decode('utf-8', errors='ignore').strip()
+    return f"test failed: {error_msg[:100]}"
+
+def report_encoder_probe(encoder_type: str, failure: str | None) -> bool:
+    """Print the outcome of run_encoder_probe and return whether the encoder works."""
+    config = ENCODER_CONFIGS[encoder_type]
+    print(f"  Testing {config['name']} ({config['codec']})...")
+    if failure is None:
+        print(f"    ✓ {config['name']} is available and functional")
+        return True
+    print(f"    ✗ {config['name']} {failure}")
+    return False
+
+def test_encoder(encoder_type: str) -> bool:
+    """
+    Test if a specific encoder is available and functional.
+
+    Args:
+        encoder_type: One of 'nvidia', 'intel', 'amd', 'cpu'
+
+    Returns:
+        True if encoder works, False otherwise
+    """
+    if encoder_type not in ENCODER_CONFIGS:
         return False
+    return report_encoder_probe(encoder_type, run_encoder_probe(encoder_type))
+
+def encoder_fingerprint() -> str:
+    """
+    Fingerprint the things that decide which encoders can work here.
+
+    Covers the FFmpeg build, the DRI render nodes, the NVIDIA driver and
+    ENCODER_PREFERENCE; a change to any of them invalidates the probe cache.
+
+    Returns:
+        Hex digest, or "" if FFmpeg couldn't be queried
+    """
+    try:
+        version = subprocess.run(['ffmpeg', '-version'], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, timeout=5).stdout.split(b'\n', 1)[0]
+    except (OSError, subprocess.TimeoutExpired):
+        return ""
+    try:
+        dri_nodes = sorted(os.listdir('/dev/dri'))
+    except OSError:
+        dri_nodes = []
+    try:
+        with open('/proc/driver/nvidia/version', 'rb') as f:
+            nvidia = f.readline()
+    except OSError:
+        nvidia = b''
+    digest = hashlib.sha1(version + nvidia)
+    digest.update(repr((dri_nodes, ENCODER_PREFERENCE)).encode())
+    return digest.hexdigest()
+
+def load_cached_encoder(fingerprint: str) -> str | None:
+    """Return the encoder picked by an earlier run with the same fingerprint, if any."""
+    if not ENCODER_PROBE_CACHE or not fingerprint:
+        return None
+    try:
+        with open(ENCODER_PROBE_CACHE) as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(cached, dict) or cached.get('fingerprint') != fingerprint:
+        return None
+    winner = cached.get('encoder')
+    return winner if winner in ENCODER_CONFIGS else None
+
+def save_cached_encoder(fingerprint: str, encoder_type: str):
+    """Remember the probed encoder for the next start; failures are ignored."""
+    if not ENCODER_PROBE_CACHE or not fingerprint:
+        return
+    try:
+        tmp = f"{ENCODER_PROBE_CACHE}.{os.getpid()}"
+        with open(tmp, 'w') as f:
+            json.dump({'fingerprint': fingerprint, 'encoder': encoder_type}, f)
+        os.replace(tmp, ENCODER_PROBE_CACHE)
+    except OSError as e:
+        print(f"  Could not write encoder probe cache: {e}")
 
 def detect_encoder() -> str:
     """
     Detect the best available hardware encoder based on ENCODER_PREFERENCE.
 
+    Reuses the previous result when the encoder fingerprint is unchanged, so
+    restarts skip the probe encodes.
+
     Returns:
         encoder_type: One of 'nvidia', 'intel', 'amd', 'cpu'
     """
@@ -149,6 +274,39 @@ def detect_encoder() -> str:
     print(f"Preference: {ENCODER_PREFERENCE}")
     print()
 
+    fingerprint = encoder_fingerprint()
+    encoder_type = load_cached_encoder(fingerprint)
+    if encoder_type:
+        config = ENCODER_CONFIGS[encoder_type]
+        print(f"Using cached probe result ({ENCODER_PROBE_CACHE})")
+    else:
+        encoder_type = probe_encoders()
+        if encoder_type:
+            save_cached_encoder(fingerprint, encoder_type)
+            config = ENCODER_CONFIGS[encoder_type]
+        else:
+            # This should never happen since CPU always works, but just in case
+            print()
+            print("=" * 60)
+            print("WARNING: No encoders available! Defaulting to CPU")
+            print("=" * 60)
+            print()
+            return 'cpu'
+
+    print()
+    print("=" * 60)
+    print(f"Selected Encoder: {config['name']} ({config['codec']})")
+    print("=" * 60)
+    print()
+    return encoder_type
+
+def probe_encoders() -> str | None:
+    """
+    Probe encoders in preference order, trying ENCODER_PREFERENCE first.
+
+    Returns:
+        The first working encoder type, or None if none work
+    """
     # Define fallback chain (preference order)
     fallback_chain = ['nvidia', 'intel', 'amd', 'cpu']
 
@@ -157,14 +315,7 @@ def detect_encoder() -> str:
         if ENCODER_PREFERENCE in ENCODER_CONFIGS:
             print(f"Testing user-specified encoder: {ENCODER_PREFERENCE}")
             if test_encoder(ENCODER_PREFERENCE):
-                encoder_type = ENCODER_PREFERENCE
-                config = ENCODER_CONFIGS[encoder_type]
-                print()
-                print("=" * 60)
-                print(f"Selected Encoder: {config['name']} ({config['codec']})")
-                print("=" * 60)
-                print()
-                return encoder_type
+                return ENCODER_PREFERENCE
             else:
                 print(f"  User-specified encoder '{ENCODER_PREFERENCE}' is not available")
                 print(f"  Falling back to auto-detection...")
@@ -175,42 +326,50 @@ def detect_encoder() -> str:
             print(f"  Falling back to auto-detection...")
             print()
 
-    # Auto-detection: try each encoder in preference order
+    # Auto-detection: probes are independent FFmpeg runs, so start them all at
+    # once and take the first success in preference order
     print("Auto-detecting available encoders...")
     print()
 
-    for encoder_type in fallback_chain:
-        if test_encoder(encoder_type):
-            config = ENCODER_CONFIGS[encoder_type]
-            print()
-            print("=" * 60)
-            print(f"Selected Encoder: {config['name']} ({config['codec']})")
-            print("=" * 60)
-            print()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(fallback_chain)) as pool:
+        failures = list(pool.map(run_encoder_probe, fallback_chain))
+
+    # Report in preference order once every probe has finished
+    working = [report_encoder_probe(encoder_type, failure) for encoder_type, failure in zip(fallback_chain, failures)]
+    for encoder_type, ok in zip(fallback_chain, working):
+        if ok:
             return encoder_type
 
-    # This should never happen since CPU always works, but just in case
-    print()
-    print("=" * 60)
-    print("WARNING: No encoders available! Defaulting to CPU")
-    print("=" * 60)
-    print()
-    return 'cpu'
+    return None
 
 # Detect encoder at startup
 SELECTED_ENCODER = detect_encoder()
 SELECTED_ENCODER_CONFIG = ENCODER_CONFIGS[SELECTED_ENCODER]
+# GPU compositing only pays off when frames end up in NVENC anyway
+USE_CUDA_FILTERS = CUDA_FILTERS and SELECTED_ENCODER == 'nvidia'
+
+def ffmpeg_has_filter(name: str) -> bool:
+    """Check whether the installed FFmpeg was built with the given filter."""
+    try:
+        listing = subprocess.run(['ffmpeg', '-hide_banner', '-filters'], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, timeout=5).stdout.decode(errors='replace')
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+    return re.search(rf'^\s*\S+\s+{re.escape(name)}\s', listing, re.MULTILINE) is not None
+
+# Volume changes go straight to the running FFmpeg through its azmq filter
+# (needs an FFmpeg built with libzmq); otherwise they restart the stream
+USE_LIVE_VOLUME = LIVE_VOLUME and ffmpeg_has_filter('azmq')
+print(f"Live volume control: {'enabled' if USE_LIVE_VOLUME else 'disabled (volume changes restart FFmpeg)'}")
 
 # ========== End Hardware Encoder Detection ==========
 
 PROC = None
 LOCK = threading.Lock()
-LAST_HIT = 0.0
-LAST_CLIENT_DISCONNECT = 0.0  # Track when last client disconnected
+LAST_HIT_NS = 0  # time.monotonic_ns() of the last viewer request
+LAST_HIT_RESOLUTION_NS = 500_000_000  # streaming clients refresh LAST_HIT_NS at most this often
 MODE = "idle"  # "idle", "black", or "live"
 CUR_IN1 = None
 CUR_IN2 = None
-CUR_AUDIO_MODE = 0  # Audio mode used for current stream (legacy)
 # New layout system globals
 CUR_LAYOUT = None  # Current layout type
 CUR_INPUTS = []  # List of input URLs in slot order
@@ -219,79 +378,116 @@ CUR_CUSTOM_SLOTS = None  # For custom layouts, list of slot definitions
 
 # Channel storage (in-memory)
 CHANNELS = []
+CHANNELS_BY_ID = {}  # channel id -> channel dict; replaced (never mutated) together with CHANNELS
+_CHANNELS_JSON = None  # cached /api/channels body, cleared whenever CHANNELS changes
 CHANNELS_LOCK = threading.Lock()
 
 # Current layout configuration
 CURRENT_LAYOUT = None
+_CURRENT_LAYOUT_JSON = None  # cached /api/layout/current body, cleared whenever CURRENT_LAYOUT changes
+_NO_LAYOUT_JSON = b'{"layout":null,"message":"No layout is currently active"}'
+# (the _CURRENT_LAYOUT_JSON it was built from, cached /api/audio/volumes body);
+# follows that cache, so CURRENT_LAYOUT writers need not clear it separately
+_AUDIO_VOLUMES_CACHE = (None, None)
+_NO_VOLUMES_JSON = b'{"volumes":{},"message":"No layout is currently active"}'
 CURRENT_LAYOUT_LOCK = threading.Lock()
+_LAYOUT_REQUEST_SEQ = 0  # bumped per /api/layout/set; only the latest one restarts FFmpeg
+_LAYOUT_REQUEST_AT = 0.0  # time.monotonic() of the last /api/layout/set
+_VOLUME_REQUEST_SEQ = 0  # bumped per restart-based /api/audio/volume; only the latest one restarts FFmpeg
 
 # Last layout configuration (persists through idle mode for cold start)
 LAST_LAYOUT = None
+_LAST_LAYOUT_JSON = None  # cached encoding for /control/status, cleared whenever LAST_LAYOUT changes
 LAST_LAYOUT_LOCK = threading.Lock()
 
-# Broadcast system for streaming to multiple clients
-BROADCAST_CLIENTS: Set[queue.Queue] = set()
+class BroadcastClient:
+    """
+    A connected /stream client. Chunks are handed from the reader thread to
+    the client's event loop, so the response generator awaits its
+    asyncio.Queue directly instead of polling a thread queue via an executor.
+
+    The queue is a bounded ring: a client that falls behind loses its oldest
+    chunks rather than its connection, and never holds more than maxsize.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, maxsize: int = 100):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.skipped = 0  # Chunks discarded because the client fell behind
+
+    def offer(self, chunk: bytes | None):
+        """Queue a chunk (None ends the stream), discarding the oldest one if full; runs on self.loop."""
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.skipped += 1
+        self.queue.put_nowait(chunk)
+
+# Broadcast system for streaming to multiple clients.
+# Copy-on-write: joins/leaves build a new tuple under BROADCAST_LOCK, so the
+# reader can iterate the current tuple without taking the lock.
+BROADCAST_CLIENTS: Tuple[BroadcastClient, ...] = ()
 BROADCAST_LOCK = threading.Lock()
+# Set whenever a new FFmpeg process is assigned to PROC (wakes broadcast_reader)
+PROC_STARTED = threading.Event()
+# Set whenever the client count or stream state changes (wakes idle_watchdog)
+IDLE_STATE_CHANGED = threading.Event()
+# Set once the current FFmpeg has produced output (or exited); cleared by stop_ffmpeg()
+FIRST_CHUNK = threading.Event()
+
+def _notify_proc_started():
+    """Wake the threads waiting on a new FFmpeg process. Call after PROC and MODE are updated."""
+    PROC_STARTED.set()
+    IDLE_STATE_CHANGED.set()
 
 # ========== Audio Volume Control with ZeroMQ ==========
 
+VOLUME_ZMQ_ADDRESS = "ipc:///tmp/multiview-volume"
+# Appended to the audio chain ending in [aout]; ':' is escaped once for the
+# filter option and once for the filtergraph parser
+VOLUME_ZMQ_FILTER = ",azmq=bind_address=" + VOLUME_ZMQ_ADDRESS.replace(':', r'\\:') if USE_LIVE_VOLUME else ""
+
 class AudioVolumeController:
-    """Manages dynamic audio volume control via ZeroMQ sockets."""
+    """
+    Sends volume commands to the running FFmpeg via ZeroMQ.
+
+    Every layout command carries one azmq filter bound to VOLUME_ZMQ_ADDRESS.
+    A replacement FFmpeg rebinds the same ipc path before the old one is
+    killed, so commands always reach the newest process.
+    """
 
     def __init__(self):
         self.context = zmq.Context()
-        self.sockets = {}  # stream_index → socket
         self.lock = threading.Lock()
 
-    def create_socket(self, stream_index: int) -> str:
-        """Create ZMQ socket for stream, return bind address."""
+    def set_volume(self, stream_index: int, volume: float) -> bool:
+        """Send volume command to FFmpeg via ZMQ. Returns True on success."""
         with self.lock:
-            # Clean up existing socket if any
-            if stream_index in self.sockets:
-                try:
-                    self.sockets[stream_index].close()
-                except:
-                    pass
-
+            # A fresh REQ socket per command: a timed-out REQ socket is stuck
+            # waiting for its reply and can't send again
             socket = self.context.socket(zmq.REQ)
-            address = f"ipc:///tmp/zmq-stream-{stream_index}"
-            socket.connect(address)
+            socket.setsockopt(zmq.LINGER, 0)
             socket.setsockopt(zmq.RCVTIMEO, 1000)  # 1 second timeout
             socket.setsockopt(zmq.SNDTIMEO, 1000)
-            self.sockets[stream_index] = socket
-            return address
-
-    def set_volume(self, stream_index: int, volume: float) -> bool:
-        """Send volume command to FFmpeg via ZMQ. Returns True on success."""
-        with self.lock:
-            if stream_index not in self.sockets:
-                print(f"No ZMQ socket for stream {stream_index}")
-                return False
-
             try:
-                # Send ZMQ command: "volume <value>"
-                command = f"volume {volume}"
-                self.sockets[stream_index].send_string(command)
-                # Wait for ACK
-                response = self.sockets[stream_index].recv_string()
+                socket.connect(VOLUME_ZMQ_ADDRESS)
+                # Filter commands are "<target> <command> <arg>"
+                socket.send_string(f"volume@a{stream_index} volume {volume}")
+                # azmq replies "<error code> <message>", 0 meaning success
+                response = socket.recv_string()
                 print(f"Set volume for stream {stream_index} to {volume}: {response}")
-                return True
+                return response.split(' ', 1)[0] == '0'
             except zmq.error.Again:
                 print(f"ZMQ timeout setting volume for stream {stream_index}")
                 return False
             except Exception as e:
                 print(f"Error setting volume for stream {stream_index}: {e}")
                 return False
+            finally:
+                socket.close()
 
     def cleanup(self):
-        """Close all sockets."""
-        with self.lock:
-            for socket in self.sockets.values():
-                try:
-                    socket.close()
-                except:
-                    pass
-            self.sockets.clear()
+        """Release the ZMQ context."""
+        self.context.term()
 
 # Global audio controller
 audio_controller = AudioVolumeController()
@@ -306,163 +502,257 @@ class LayoutConfigModel(BaseModel):
     custom_slots: list = None  # For custom layouts: [{ id, name, x, y, width, height }]
     audio_volumes: Dict[str, float] = None  # slotId -> volume (0.0-1.0), optional
 
-app.mount("/hls", StaticFiles(directory=OUTDIR), name="hls")
+    @model_validator(mode='after')
+    def check_slots(self):
+        """
+        Validate layout type, slot assignments and audio source.
+
+        Raises ValueError, which FastAPI reports as a 422 before the handler runs.
+        """
+        if self.layout == 'custom':
+            if not self.custom_slots:
+                raise ValueError("Custom layout requires custom_slots")
+            if len(self.custom_slots) > 5:
+                raise ValueError("Custom layout must have 1-5 slots")
+            expected_slots = [slot['id'] for slot in self.custom_slots]
+        elif self.layout in LAYOUT_SLOTS:
+            expected_slots = LAYOUT_SLOTS[self.layout]
+        else:
+            raise ValueError(f"Unknown layout type: {self.layout}")
+
+        missing = [slot for slot in expected_slots if slot not in self.streams]
+        if missing:
+            raise ValueError(f"Layout '{self.layout}' requires slot '{missing[0]}' to be assigned.")
 
-@app.middleware("http")
-async def touch_last_hit(request: Request, call_next):
-    global LAST_HIT
-    if request.url.path.startswith("/hls") or request.url.path == "/stream":
-        LAST_HIT = time.time()
-    return await call_next(request)
+        if self.audio_source not in expected_slots:
+            raise ValueError(f"Invalid audio_source: {self.audio_source}. Must be one of {list(expected_slots)}.")
+
+        return self
+
+class HlsStaticFiles(StaticFiles):
+    """StaticFiles for /hls that also records each request as viewer activity."""
+
+    async def __call__(self, scope, receive, send):
+        global LAST_HIT_NS
+        LAST_HIT_NS = time.monotonic_ns()
+        await super().__call__(scope, receive, send)
+
+# Output goes to pipe:1, so OUTDIR normally holds no segments; only serve it on request.
+# /stream records its own hits, so no app-wide middleware is needed
+if ENABLE_HLS_MOUNT:
+    app.mount("/hls", HlsStaticFiles(directory=OUTDIR, html=False), name="hls")
 
 # ========== M3U Parsing ==========
 
-def parse_m3u(content: str):
+# Matches every metadata attribute on an #EXTINF line; the named group tells which one
+_EXTINF_ATTR_RE = re.compile(r'(tvg-id|tvg-name|tvg-logo|tvg-chno|group-title)="([^"]*)"')
+
+def _iter_extinf_pairs(lines):
+    """Yield (extinf_line, stream_url) pairs from raw M3U lines."""
+    pending_extinf = None  # Last #EXTINF line still waiting for its URL
+
+    for raw_line in lines:
+        line = raw_line.strip()
+        if not line:
+            continue
+
+        if line.startswith('#EXTINF:'):
+            pending_extinf = line
+        elif pending_extinf is not None and not line.startswith('#'):
+            # Other directives/comments (#EXTM3U, #EXTVLCOPT, ...) are skipped
+            yield pending_extinf, line
+            pending_extinf = None
+
+def _build_channel(extinf: str, stream_url: str) -> dict:
+    """Build a channel dictionary from an #EXTINF line and its stream URL."""
+    # Extract all tvg-* / group-title attributes in a single pass
+    attrs = dict(_EXTINF_ATTR_RE.findall(extinf))
+    tvg_id = attrs.get("tvg-id", "")
+    tvg_name = attrs.get("tvg-name", "")
+
+    # Extract display name (after the first comma)
+    display_name = extinf.partition(',')[2].strip()
+
+    return {
+        # Generate unique ID (use tvg-id if available, otherwise UUID)
+        "id": tvg_id if tvg_id else str(uuid.uuid4()),
+        # Prefer tvg-name, fall back to display_name
+        "name": tvg_name if tvg_name else display_name,
+        "icon": attrs.get("tvg-logo", ""),
+        "url": stream_url,
+        "group": attrs.get("group-title", ""),
+        "channel_number": attrs.get("tvg-chno", ""),
+    }
+
+def parse_m3u(lines):
     """
     Parse M3U content and return list of channel dictionaries.
 
+    Accepts any iterable of lines (an open file, a streaming HTTP response) so
+    large playlists are parsed as they arrive instead of being buffered whole.
+    A plain string is split into lines first.
+
     Expected format:
     #EXTINF:-1 tvg-id="..." tvg-name="..." tvg-logo="..." tvg-chno="..." group-title="...",Display Name
     http://stream.url
     """
-    channels = []
-    lines = content.strip().split('\n')
-    i = 0
+    if isinstance(lines, str):
+        lines = lines.splitlines()
 
-    while i < len(lines):
-        line = lines[i].strip()
+    # Skip our own output so MultiView can't be composited into itself
+    return [
+        channel
+        for channel in itertools.starmap(_build_channel, _iter_extinf_pairs(lines))
+        if channel["name"] != "MultiView"
+    ]
 
-        # Look for #EXTINF lines
-        if line.startswith('#EXTINF:'):
-            # Extract metadata using regex
-            tvg_id = ""
-            tvg_name = ""
-            tvg_logo = ""
-            tvg_chno = ""
-            group_title = ""
-            display_name = ""
-
-            # Extract tvg-id
-            match = re.search(r'tvg-id="([^"]*)"', line)
-            if match:
-                tvg_id = match.group(1)
-
-            # Extract tvg-name
-            match = re.search(r'tvg-name="([^"]*)"', line)
-            if match:
-                tvg_name = match.group(1)
-
-            # Extract tvg-logo
-            match = re.search(r'tvg-logo="([^"]*)"', line)
-            if match:
-                tvg_logo = match.group(1)
-
-            # Extract tvg-chno
-            match = re.search(r'tvg-chno="([^"]*)"', line)
-            if match:
-                tvg_chno = match.group(1)
-
-            # Extract group-title
-            match = re.search(r'group-title="([^"]*)"', line)
-            if match:
-                group_title = match.group(1)
-
-            # Extract display name (after last comma)
-            if ',' in line:
-                display_name = line.split(',', 1)[1].strip()
-
-            # Next line should be the stream URL
-            i += 1
-            if i < len(lines):
-                stream_url = lines[i].strip()
-
-                # Skip empty URLs or comments
-                if stream_url and not stream_url.startswith('#'):
-                    # Generate unique ID (use tvg-id if available, otherwise UUID)
-                    channel_id = tvg_id if tvg_id else str(uuid.uuid4())
-
-                    # Prefer tvg-name, fall back to display_name
-                    name = tvg_name if tvg_name else display_name
-
-                    if name == "MultiView":
-                        continue
-
-                    channels.append({
-                        "id": channel_id,
-                        "name": name,
-                        "icon": tvg_logo,
-                        "url": stream_url,
-                        "group": group_title,
-                        "channel_number": tvg_chno,
-                    })
-
-        i += 1
-
-    return channels
+# Shared keep-alive client for playlist fetches (connect/read/write/pool timeouts)
+HTTP = httpx.Client(
+    headers={"User-Agent": DEFAULT_UA},
+    limits=httpx.Limits(max_connections=16, max_keepalive_connections=8),
+    follow_redirects=True,
+)
+M3U_TIMEOUT = httpx.Timeout(30.0, connect=5.0)
+
+# Serializes playlist refreshes (guards the validators below); readers use CHANNELS_LOCK
+_M3U_FETCH_LOCK = threading.Lock()
+
+# Validators from the last successful fetch, sent back as a conditional GET
+_M3U_ETAG = None
+_M3U_LAST_MODIFIED = None
+_M3U_FILE_MTIME_NS = None
 
 def fetch_and_parse_m3u():
-    """Fetch M3U from source and parse it."""
+    """
+    Fetch M3U from source and parse it.
+
+    Returns None when the source is unchanged since the last successful fetch
+    (HTTP 304, or the same file mtime), so callers can keep their channel list.
+    Failures return [] and forget the validators, so the next refresh does a
+    full fetch instead of being told "unchanged" about a list it never kept.
+    """
+    global _M3U_ETAG, _M3U_LAST_MODIFIED, _M3U_FILE_MTIME_NS
+    # Only revalidate while there is a channel list worth keeping
+    have_channels = bool(CHANNELS)
     try:
         # Check if M3U_SOURCE is a URL or file path
         if M3U_SOURCE.startswith('http://') or M3U_SOURCE.startswith('https://'):
-            # Fetch from URL
-            with urlopen(M3U_SOURCE, timeout=30) as response:
-                content = response.read().decode('utf-8')
+            # Stream from URL over the pooled client (gzip is negotiated and decoded by httpx)
+            headers = {}
+            if have_channels and _M3U_ETAG:
+                headers['If-None-Match'] = _M3U_ETAG
+            if have_channels and _M3U_LAST_MODIFIED:
+                headers['If-Modified-Since'] = _M3U_LAST_MODIFIED
+            with HTTP.stream("GET", M3U_SOURCE, headers=headers, timeout=M3U_TIMEOUT) as response:
+                if response.status_code == 304:
+                    return None
+                response.raise_for_status()
+                channels = parse_m3u(response.iter_lines())
+                _M3U_ETAG = response.headers.get('ETag')
+                _M3U_LAST_MODIFIED = response.headers.get('Last-Modified')
+                return channels
         else:
-            # Read from file
+            # Read from file, skipping the parse if it has not been modified
+            mtime_ns = os.stat(M3U_SOURCE).st_mtime_ns
+            if have_channels and mtime_ns == _M3U_FILE_MTIME_NS:
+                return None
             with open(M3U_SOURCE, 'r', encoding='utf-8') as f:
-                content = f.read()
-
-        return parse_m3u(content)
-    except URLError as e:
+                channels = parse_m3u(f)
+            _M3U_FILE_MTIME_NS = mtime_ns
+            return channels
+    except httpx.HTTPError as e:
         print(f"Error fetching M3U from URL: {e}")
-        return []
     except FileNotFoundError:
         print(f"M3U file not found: {M3U_SOURCE}")
-        return []
     except Exception as e:
         print(f"Error parsing M3U: {e}")
-        return []
+    _M3U_ETAG = _M3U_LAST_MODIFIED = _M3U_FILE_MTIME_NS = None
+    return []
 
 def load_channels():
     """Load channels from M3U source into global CHANNELS list."""
-    global CHANNELS
-    with CHANNELS_LOCK:
-        CHANNELS = fetch_and_parse_m3u()
-        print(f"Loaded {len(CHANNELS)} channels from M3U")
+    global CHANNELS, CHANNELS_BY_ID, _CHANNELS_JSON
+    # Fetch and index without CHANNELS_LOCK so readers are never blocked on the
+    # network; _M3U_FETCH_LOCK only serializes concurrent refreshes.
+    with _M3U_FETCH_LOCK:
+        channels = fetch_and_parse_m3u()
+        if channels is None:
+            print(f"M3U unchanged, keeping {len(CHANNELS)} channels")
+            return
+        # Iterate in reverse so the first entry wins on duplicate tvg-ids
+        channels_by_id = {channel["id"]: channel for channel in reversed(channels)}
+
+        with CHANNELS_LOCK:
+            CHANNELS = channels
+            CHANNELS_BY_ID = channels_by_id
+            _CHANNELS_JSON = None
+    print(f"Loaded {len(channels)} channels from M3U")
 
 # ========== End M3U Parsing ==========
 
-def _headers_value():
-    return SOURCE_HEADERS.replace("\\n", "\r\n") if SOURCE_HEADERS else ""
-
-def _gpu_or_cpu_parts():
-    """Return FFmpeg encoder arguments based on detected hardware encoder."""
-    return SELECTED_ENCODER_CONFIG['encode_args']
+# Extra request headers for every input, with literal "\\n" separators turned into CRLF
+_SOURCE_HEADERS_VALUE = SOURCE_HEADERS.replace("\\n", "\r\n") if SOURCE_HEADERS else ""
+_HAS_SOURCE_HEADERS = bool(SOURCE_HEADERS.strip())
+
+def _strip_pix_fmt(args):
+    """Drop a -pix_fmt pair from encoder args."""
+    if "-pix_fmt" in args:
+        i = args.index("-pix_fmt")
+        return args[:i] + args[i + 2:]
+    return args
+
+# Encoder arguments for the detected hardware encoder. Tunables are fixed at
+# boot, so these are built once and concatenated into every command.
+_ENC_PARTS = tuple(SELECTED_ENCODER_CONFIG['encode_args'])
+# With CUDA filters the graph already hands NVENC NV12 frames in device memory,
+# so -pix_fmt is dropped (forcing it would need a hwdownload).
+_ENC_PARTS_CUDA = _strip_pix_fmt(_ENC_PARTS)
+
+# Output MPEG-TS to stdout for broadcasting to multiple HTTP clients.
+# This mimics HDHomeRun behavior - each client starts at the live point.
+_OUTPUT_PARTS = (
+    "-c:a", "aac", "-b:a", "128k", "-ar", "48000", "-ac", "2",
+    "-fflags", "+genpts",
+    "-flags", "low_delay",
+    "-f", "mpegts",
+    "-mpegts_copyts", "0",
+    "pipe:1",  # Output to stdout
+)
 
-def _output_parts():
-    """
-    Output MPEG-TS to stdout for broadcasting to multiple HTTP clients.
-    This mimics HDHomeRun behavior - each client starts at the live point.
-    """
-    return [
-        "-c:a", "aac", "-b:a", "128k", "-ar", "48000", "-ac", "2",
-        "-fflags", "+genpts",
-        "-flags", "low_delay",
-        "-f", "mpegts",
-        "-mpegts_copyts", "0",
-        "pipe:1"  # Output to stdout
-    ]
+# Fixed pieces of every layout command, assembled once
+_FFMPEG_PREFIX = ("ffmpeg", "-loglevel", "warning", "-hide_banner", "-nostdin")
+# One shared CUDA device for decoders, uploads and cuda filters
+_CUDA_DEVICE_ARGS = ("-init_hw_device", "cuda=cu", "-filter_hw_device", "cu")
+_CUDA_INPUT_ARGS = ("-hwaccel", "cuda", "-hwaccel_device", "cu", "-hwaccel_output_format", "cuda")
+# Tradeoff (opt-in via FAST_RESTART): ~1 s of probing instead of FFmpeg's
+# default 5 s starts each (re)start sooner, but a source whose audio shows up
+# late may not be detected and the graph's [i:a] mapping then fails
+_FAST_PROBE_ARGS = ("-probesize", "1000000", "-analyzeduration", "1000000", "-fflags", "+nobuffer")
+_INPUT_ARGS = (*(_FAST_PROBE_ARGS if FAST_RESTART else ()), "-thread_queue_size", "1024", "-user_agent", DEFAULT_UA)
+_RECONNECT_ARGS = (
+    "-reconnect", "1", "-reconnect_streamed", "1", "-reconnect_on_network_error", "1",
+    "-rw_timeout", "15000000", "-timeout", "15000000",
+)
+# Everything that precedes "-i <url>" for each input, optional headers included
+_PER_INPUT_ARGS = (
+    *_INPUT_ARGS,
+    *(("-headers", _SOURCE_HEADERS_VALUE) if _HAS_SOURCE_HEADERS else ()),
+    *_RECONNECT_ARGS,
+)
+_PER_INPUT_ARGS_CUDA = (*_CUDA_INPUT_ARGS, *_PER_INPUT_ARGS)
+# Map the [v]/[aout] graph outputs, then encode and mux
+_LAYOUT_TAIL = ("-map", "[v]", "-map", "[aout]", *_ENC_PARTS, *_OUTPUT_PARTS)
+_LAYOUT_TAIL_CUDA = ("-map", "[v]", "-map", "[aout]", *_ENC_PARTS_CUDA, *_OUTPUT_PARTS)
 
 def build_black_cmd():
     # Pure black video + silent audio; no text overlay (avoids drawtext dependency)
     cmd = [
-        "ffmpeg","-loglevel","warning","-hide_banner","-nostdin",
+        *_FFMPEG_PREFIX,
         "-re","-f","lavfi","-i","color=c=black:s=1920x1080:r=30",
         "-f","lavfi","-i","anullsrc=channel_layout=stereo:sample_rate=48000",
         "-map","0:v","-map","1:a",
     ]
-    cmd += _gpu_or_cpu_parts() + _output_parts()
+    cmd += [*_ENC_PARTS, *_OUTPUT_PARTS]
     return cmd
 
 
@@ -493,23 +783,25 @@ def build_audio_filter(num_streams: int, audio_volumes: dict = None) -> str:
     for i in range(num_streams):
         volume = audio_volumes.get(i, 1.0)
 
-        # Format audio and apply volume
+        # A lone stream needs no mixer, so it is labelled as the output directly
+        label = "aout" if num_streams == 1 else f"a{i}"
+
+        # Format audio and apply volume; the volume instance is named
+        # a{i} so AudioVolumeController can retarget it while running
         audio_filter = (
             f"[{i}:a]"
             f"aformat=sample_rates=48000:channel_layouts=stereo,"
-            f"volume={volume}"
-            f"[a{i}]"
+            f"volume@a{i}={volume}"
+            f"{VOLUME_ZMQ_FILTER if label == 'aout' else ''}"
+            f"[{label}]"
         )
         audio_parts.append(audio_filter)
 
-    # Mix all audio streams if multiple, otherwise just use the single stream
+    # Mix all audio streams if multiple; a single stream already ends in [aout]
     if num_streams > 1:
         inputs = ''.join(f"[a{i}]" for i in range(num_streams))
-        mix_filter = f"{inputs}amix=inputs={num_streams}:duration=longest:normalize=0[aout]"
+        mix_filter = f"{inputs}amix=inputs={num_streams}:duration=longest:normalize=0{VOLUME_ZMQ_FILTER}[aout]"
         audio_parts.append(mix_filter)
-    else:
-        # Single stream, just pass through
-        audio_parts.append("[a0]anull[aout]")
 
     return ";".join(audio_parts)
 
@@ -523,61 +815,78 @@ def build_layout_cmd(layout: str, input_urls: list, audio_index: int, custom_slo
         audio_index: Index of input to use for audio (0-based) - DEPRECATED, kept for compatibility
         custom_slots: For custom layouts, list of slot definitions with x, y, width, height
         audio_volumes: Dict mapping stream index to volume (0.0-1.0)
+
+    The rest of the command depends only on the layout geometry, so it is
+    memoized on a hashable copy of the slots; the input URLs and volumes are
+    slotted in per call. Callers get a fresh list they may mutate.
+    """
+    head, per_input, tail = _layout_cmd_template(
+        layout,
+        len(input_urls),
+        tuple(tuple(slot.items()) for slot in custom_slots) if custom_slots else None,
+    )
+
+    # Add each input with reconnection options
+    cmd = list(head)
+    for url in input_urls:
+        cmd.extend(per_input)
+        cmd.append("-i")
+        cmd.append(url)
+    cmd.extend(tail)
+
+    # Fill in the per-input volumes (tail starts with "-filter_complex", <graph>)
+    fc = cmd[-len(tail) + 1]
+    for i in range(len(input_urls)):
+        volume = audio_volumes.get(i, 1.0) if audio_volumes else 1.0
+        fc = fc.replace(f"__VOL{i}__", str(volume))
+    cmd[-len(tail) + 1] = fc
+    return cmd
+
+@functools.lru_cache(maxsize=32)
+def _layout_cmd_template(layout: str, num_inputs: int, custom_slots: tuple) -> tuple:
     """
+    Build the URL-independent parts of a layout command from frozen arguments.
+
+    Volumes are left as __VOL<i>__ placeholders in the filter graph.
+
+    Returns:
+        (args before the inputs, args preceding each "-i <url>", args after the inputs)
+    """
+    custom_slots = [dict(slot) for slot in custom_slots] if custom_slots else None
+    audio_volumes = {i: f"__VOL{i}__" for i in range(num_inputs)}
+
+    # Composite on the GPU when enabled and supported for this layout
+    cuda_tiles = cuda_layout_tiles(layout, custom_slots) if USE_CUDA_FILTERS else None
+    cuda = cuda_tiles is not None
+
     # Build video filter_complex based on layout
-    if layout == 'pip':
-        video_fc = build_pip_filter(input_urls)
-    elif layout == 'dvd_pip':
-        video_fc = build_dvd_pip_filter(input_urls)
-    elif layout == 'split_h':
-        video_fc = build_split_h_filter(input_urls)
-    elif layout == 'split_v':
-        video_fc = build_split_v_filter(input_urls)
-    elif layout == 'grid_2x2':
-        video_fc = build_grid_2x2_filter(input_urls)
-    elif layout == 'multi_pip_2':
-        video_fc = build_multi_pip_2_filter(input_urls)
-    elif layout == 'multi_pip_3':
-        video_fc = build_multi_pip_3_filter(input_urls)
-    elif layout == 'multi_pip_4':
-        video_fc = build_multi_pip_4_filter(input_urls)
+    if cuda:
+        # PiP ends with its main input, like the CPU graph; the others run until all inputs end
+        video_fc = build_cuda_tiles_filter(cuda_tiles, shortest=1 if layout == 'pip' else 0)
     elif layout == 'custom':
         if not custom_slots:
             raise ValueError("Custom layout requires slot definitions")
         video_fc = build_custom_layout_filter(custom_slots)
     else:
-        raise ValueError(f"Unknown layout type: {layout}")
+        try:
+            video_fc = _LAYOUT_FILTERS[layout]
+        except KeyError:
+            raise ValueError(f"Unknown layout type: {layout}") from None
 
     # Build audio filter with ZeroMQ controls
-    audio_fc = build_audio_filter(len(input_urls), audio_volumes)
+    audio_fc = build_audio_filter(num_inputs, audio_volumes)
 
     # Combine video and audio filters
     fc = f"{video_fc};{audio_fc}"
 
-    # Map both video and audio outputs
-    amap = ["-map", "[v]", "-map", "[aout]"]
+    # ffmpeg global options, plus the CUDA device when compositing on the GPU
+    head = _FFMPEG_PREFIX + _CUDA_DEVICE_ARGS if cuda else _FFMPEG_PREFIX
+    per_input = _PER_INPUT_ARGS_CUDA if cuda else _PER_INPUT_ARGS
 
-    # Build ffmpeg command with all inputs
-    cmd = ["ffmpeg", "-loglevel", "warning", "-hide_banner", "-nostdin"]
+    # filter_complex, then output mapping, encoder and muxer arguments
+    tail = ("-filter_complex", fc) + (_LAYOUT_TAIL_CUDA if cuda else _LAYOUT_TAIL)
 
-    # Add each input with reconnection options
-    for url in input_urls:
-        cmd += [
-            "-thread_queue_size", "1024", "-user_agent", DEFAULT_UA,
-        ]
-        if SOURCE_HEADERS.strip():
-            cmd += ["-headers", _headers_value()]
-        cmd += [
-            "-reconnect", "1", "-reconnect_streamed", "1", "-reconnect_on_network_error", "1",
-            "-rw_timeout", "15000000", "-timeout", "15000000",
-            "-i", url,
-        ]
-
-    # Add filter_complex and audio mapping
-    cmd += ["-filter_complex", fc]
-    cmd += amap + _gpu_or_cpu_parts() + _output_parts()
-
-    return cmd
+    return head, per_input, tail
 
 def build_pip_filter(inputs: list) -> str:
     """Picture-in-Picture: 1 main + 1 inset"""
@@ -589,6 +898,90 @@ def build_pip_filter(inputs: list) -> str:
         f"[base][pip]overlay=W-w-{INSET_MARGIN}:H-h-{INSET_MARGIN}:shortest=1[v]"
     )
 
+def cuda_layout_tiles(layout: str, custom_slots: list = None) -> list | None:
+    """
+    Tile geometry for compositing a layout on the GPU.
+
+    Mirrors the CPU filter builders: one (x, y, width, height, border, backdrop)
+    tuple per input, in input (z) order. Each input is fitted into its
+    width x height box; border is the white frame width around the box and
+    backdrop paints the box black first (custom slots can overlap, so their
+    letterboxing must stay opaque). Inset frames assume 16:9 sources, as the
+    CPU pads do. Returns None for layouts without a GPU version (dvd_pip's
+    animated position needs the CPU overlay's expression evaluation).
+    """
+    full = (0, 0, 1920, 1080, 0, False)
+
+    if layout == 'pip':
+        frame_x = 1920 - (INSET_SCALE + 16) - INSET_MARGIN
+        frame_y = 1080 - 376 - INSET_MARGIN
+        return [full, (frame_x + 8, frame_y + 8, INSET_SCALE, 376 - 16, 8, False)]
+    if layout == 'split_h':
+        return [(0, 0, 960, 1080, 0, False), (960, 0, 960, 1080, 0, False)]
+    if layout == 'split_v':
+        return [(0, 0, 1920, 540, 0, False), (0, 540, 1920, 540, 0, False)]
+    if layout == 'grid_2x2':
+        return [(x, y, 960, 540, 0, False) for y in (0, 540) for x in (0, 960)]
+    if layout in ('multi_pip_2', 'multi_pip_3', 'multi_pip_4'):
+        # Same inset sizes, 20px margin and 10px gaps as the CPU builders
+        inset_w, inset_h = (480, 270) if layout == 'multi_pip_2' else (384, 216)
+        frame_x = 1920 - (inset_w + 8) - 20
+        bottom = 1080 - (inset_h + 8) - 20
+        step = inset_h + 8 + 10
+        frame_ys = {
+            'multi_pip_2': (bottom, bottom - step),
+            'multi_pip_3': (bottom, bottom - step, bottom - 2 * step),
+            'multi_pip_4': (bottom, bottom - step, 20, 20 + step),
+        }[layout]
+        return [full] + [(frame_x + 4, y + 4, inset_w, inset_h, 4, False) for y in frame_ys]
+    if layout == 'custom' and custom_slots:
+        tiles = []
+        for slot in sorted(custom_slots, key=lambda s: s['width'] * s['height'], reverse=True):
+            if slot.get('border', False):
+                # Border frame is pulled back 8px (clamped at the edge), content sits inside it
+                tiles.append((max(0, slot['x'] - 8) + 8, max(0, slot['y'] - 8) + 8, slot['width'], slot['height'], 8, True))
+            else:
+                tiles.append((slot['x'], slot['y'], slot['width'], slot['height'], 0, True))
+        return tiles
+    return None
+
+def build_cuda_tiles_filter(tiles: list, shortest: int = 0) -> str:
+    """
+    Composite a tiled layout entirely on the GPU: frames stay in CUDA memory
+    from decode to NVENC. Letterboxing, tile backdrops and white borders come
+    from small uploaded color canvases instead of pad.
+
+    Args:
+        tiles: One (x, y, width, height, border, backdrop) tuple per input (see cuda_layout_tiles)
+        shortest: overlay_cuda shortest flag for the input overlays
+
+    Returns:
+        FFmpeg filter_complex string
+    """
+    parts = ["color=c=black:s=1920x1080:r=30,format=nv12,hwupload[canvas]"]
+    prev = "canvas"
+
+    for i, (x, y, w, h, border, backdrop) in enumerate(tiles):
+        if border:
+            parts.append(f"color=c=white:s={w + 2 * border}x{h + 2 * border}:r=30,format=nv12,hwupload[frame{i}]")
+            parts.append(f"[{prev}][frame{i}]overlay_cuda={x - border}:{y - border}[framed{i}]")
+            prev = f"framed{i}"
+        if backdrop and (x, y, w, h) != (0, 0, 1920, 1080):  # the canvas is already black there
+            parts.append(f"color=c=black:s={w}x{h}:r=30,format=nv12,hwupload[backdrop{i}]")
+            parts.append(f"[{prev}][backdrop{i}]overlay_cuda={x}:{y}[filled{i}]")
+            prev = f"filled{i}"
+
+        # Fit inside the tile, centred (NV12 needs even dimensions)
+        parts.append(
+            f"[{i}:v]fps=30,scale_cuda={w}:{h}:force_original_aspect_ratio=decrease:"
+            f"force_divisible_by=2:format=nv12[s{i}]"
+        )
+        out = "v" if i == len(tiles) - 1 else f"tmp{i}"
+        parts.append(f"[{prev}][s{i}]overlay_cuda={x}+({w}-w)/2:{y}+({h}-h)/2:shortest={shortest}[{out}]")
+        prev = out
+
+    return ";".join(parts)
+
 def build_dvd_pip_filter(inputs: list) -> str:
     """DVD Screensaver PiP: 1 main + 1 bouncing inset (just like the DVD logo!)"""
     margin = 10
@@ -637,9 +1030,8 @@ def build_grid_2x2_filter(inputs: list) -> str:
         "pad=960:540:(ow-iw)/2:(oh-ih)/2,setsar=1[s2];"
         "[3:v]fps=30,scale=960:540:force_original_aspect_ratio=decrease,"
         "pad=960:540:(ow-iw)/2:(oh-ih)/2,setsar=1[s3];"
-        "[s0][s1]hstack=inputs=2:shortest=0[top];"
-        "[s2][s3]hstack=inputs=2:shortest=0[bottom];"
-        "[top][bottom]vstack=inputs=2:shortest=0[v]"
+        # One xstack pass places all four tiles instead of hstack+hstack+vstack
+        "[s0][s1][s2][s3]xstack=inputs=4:layout=0_0|w0_0|0_h0|w0_h0:shortest=0[v]"
     )
 
 def build_multi_pip_2_filter(inputs: list) -> str:
@@ -714,27 +1106,34 @@ def build_custom_layout_filter(slots: list) -> str:
     if not slots or len(slots) > 5:
         raise ValueError("Custom layout must have 1-5 slots")
 
+    # Only the geometry shapes the graph; slot ids and names don't
+    geometry = tuple(
+        (slot['x'], slot['y'], slot['width'], slot['height'], bool(slot.get('border', False)))
+        for slot in slots
+    )
+    return _build_custom_layout_filter_cached(geometry)
+
+@functools.lru_cache(maxsize=64)
+def _build_custom_layout_filter_cached(geometry: tuple) -> str:
+    """Build the custom layout graph from (x, y, width, height, border) tuples."""
     # Sort slots by size (largest first) for z-ordering
-    sorted_slots = sorted(slots, key=lambda s: s['width'] * s['height'], reverse=True)
+    sorted_slots = sorted(geometry, key=lambda s: s[2] * s[3], reverse=True)
 
     # Build filter string
     parts = []
 
     # Scale each input to its slot dimensions
-    for i, slot in enumerate(sorted_slots):
-        w = slot['width']
-        h = slot['height']
-        has_border = slot.get('border', False)
-
-        # Base scale and pad to ensure content fits
-        filter_chain = f"[{i}:v]fps=30,scale={w}:{h}:force_original_aspect_ratio=decrease," \
-                      f"pad={w}:{h}:(ow-iw)/2:(oh-ih)/2,setsar=1"
-
-        # Add white border if enabled (8px on all sides)
+    for i, (_, _, w, h, has_border) in enumerate(sorted_slots):
         if has_border:
-            border_width = w + 16  # 8px on each side
-            border_height = h + 16
-            filter_chain += f",pad={border_width}:{border_height}:8:8:color=white"
+            # Pad straight to the framed size, then paint the 8px white frame in
+            # place: one pad per frame instead of letterbox pad + border pad
+            filter_chain = f"[{i}:v]fps=30,scale={w}:{h}:force_original_aspect_ratio=decrease," \
+                          f"pad={w + 16}:{h + 16}:(ow-iw)/2:(oh-ih)/2,setsar=1," \
+                          f"drawbox=x=0:y=0:w=iw:h=ih:color=white:t=8"
+        else:
+            # Base scale and pad to ensure content fits
+            filter_chain = f"[{i}:v]fps=30,scale={w}:{h}:force_original_aspect_ratio=decrease," \
+                          f"pad={w}:{h}:(ow-iw)/2:(oh-ih)/2,setsar=1"
 
         filter_chain += f"[s{i}]"
         parts.append(filter_chain)
@@ -744,11 +1143,7 @@ def build_custom_layout_filter(slots: list) -> str:
 
     # Chain overlays
     prev_label = "base"
-    for i, slot in enumerate(sorted_slots):
-        x = slot['x']
-        y = slot['y']
-        has_border = slot.get('border', False)
-
+    for i, (x, y, _, _, has_border) in enumerate(sorted_slots):
         # Adjust position if border is enabled (offset by -8px to account for border)
         if has_border:
             x = max(0, x - 8)
@@ -764,32 +1159,156 @@ def build_custom_layout_filter(slots: list) -> str:
 
     return ";".join(parts)
 
+# Filter builder per fixed layout type (custom layouts are built from their slots)
+_LAYOUT_BUILDERS = {
+    'pip': build_pip_filter,
+    'dvd_pip': build_dvd_pip_filter,
+    'split_h': build_split_h_filter,
+    'split_v': build_split_v_filter,
+    'grid_2x2': build_grid_2x2_filter,
+    'multi_pip_2': build_multi_pip_2_filter,
+    'multi_pip_3': build_multi_pip_3_filter,
+    'multi_pip_4': build_multi_pip_4_filter,
+}
+
+# Fixed layouts depend only on tunables read at startup, so their video graphs
+# are built once here rather than on every layout switch
+_LAYOUT_FILTERS = {layout: builder(None) for layout, builder in _LAYOUT_BUILDERS.items()}
+
+# Commands whose shape never changes at runtime are assembled once at import:
+# tunables and the selected encoder are fixed for the process lifetime, so only
+# the input URLs of the legacy two-input PiP need substituting at start time.
+_BLACK_CMD = tuple(build_black_cmd())
+_LIVE_CMD_TEMPLATE = tuple(build_live_cmd("__IN1__", "__IN2__", AUDIO_SOURCE))
+
+# fcntl.F_SETPIPE_SZ is only exported on Python 3.10+; the Linux value is 1031
+F_SETPIPE_SZ = getattr(fcntl, "F_SETPIPE_SZ", 1031)
+
+# Absolute path so subprocess can use posix_spawn (it falls back to fork+exec for bare names)
+FFMPEG_BIN = shutil.which("ffmpeg") or "ffmpeg"
+
+def spawn_ffmpeg(cmd):
+    """
+    Start an FFmpeg process with stdout captured for broadcasting and stderr
+    forwarded to the log.
+
+    Keeps every option on CPython's posix_spawn path (no preexec_fn, no
+    close_fds, no new session), which avoids duplicating the server's page
+    tables on each restart. Python-created fds are non-inheritable, so
+    close_fds=False does not leak them into FFmpeg.
+    """
+    cmd = list(cmd)
+    if cmd[0] == "ffmpeg":
+        cmd[0] = FFMPEG_BIN
+    proc = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        bufsize=0,
+        close_fds=False,
+    )
+    _enlarge_pipe(proc.stdout.fileno())
+    # Nothing else reads stderr; without a drain FFmpeg blocks once the pipe fills
+    threading.Thread(target=_drain_stderr, args=(proc,), daemon=True).start()
+    return proc
+
+# Most recent FFmpeg log lines across processes, reported by /control/status
+FFMPEG_LOG_TAIL = deque(maxlen=20)
+
+def _drain_stderr(proc):
+    """Forward an FFmpeg process's stderr to our log until it exits."""
+    # proc.stderr is unbuffered; wrap the fd so lines aren't read a byte at a time
+    with open(proc.stderr.fileno(), "rb", closefd=False) as stderr:
+        for line in stderr:
+            line = f"ffmpeg[{proc.pid}]: {line.decode('utf-8', errors='replace').rstrip()}"
+            FFMPEG_LOG_TAIL.append(line)
+            print(line)
+    # EOF: the process has exited, release the pipe now rather than at GC
+    proc.stderr.close()
+
+def _enlarge_pipe(fd, size=PIPE_SIZE):
+    """
+    Grow a pipe's kernel buffer so FFmpeg keeps writing while the broadcaster
+    is briefly busy. Best effort: the size is capped by /proc/sys/fs/pipe-max-size
+    for unprivileged processes, and F_SETPIPE_SZ is Linux-only.
+    """
+    try:
+        fcntl.fcntl(fd, F_SETPIPE_SZ, size)
+    except OSError:
+        pass
+
+def wait_for_exit(proc, timeout: float):
+    """
+    Wait up to timeout seconds for proc to exit and reap it.
+
+    Popen.wait(timeout) polls with growing sleeps; a pidfd becomes readable
+    the moment the process exits, so the wait ends right away.
+
+    Raises:
+        subprocess.TimeoutExpired: if proc is still running after timeout
+    """
+    try:
+        pidfd = os.pidfd_open(proc.pid)
+    except (AttributeError, OSError):
+        # No pidfd support (old kernel/Python) or already reaped
+        proc.wait(timeout=timeout)
+        return
+    try:
+        poller = select.poll()
+        poller.register(pidfd, select.POLLIN)
+        if not poller.poll(timeout * 1000):
+            raise subprocess.TimeoutExpired(proc.args, timeout)
+    finally:
+        os.close(pidfd)
+    proc.wait()
+
 def stop_ffmpeg():
     global PROC
+    FIRST_CHUNK.clear()
     if PROC and PROC.poll() is None:
         try:
             PROC.send_signal(signal.SIGINT)
-            PROC.wait(timeout=3)
+            wait_for_exit(PROC, 3)
         except Exception:
-            try: PROC.kill()
-            except Exception: pass
+            kill_and_reap(PROC)
     PROC = None
 
+def reap_in_background(proc):
+    """Wait for a killed FFmpeg process on a daemon thread so it never lingers as a zombie."""
+    threading.Thread(target=proc.wait, daemon=True).start()
+
+def kill_and_reap(proc):
+    """SIGKILL an FFmpeg process and leave the wait to reap_in_background()."""
+    # The pid can't be recycled before it's reaped, and only the reaper thread waits on it
+    try:
+        os.kill(proc.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    reap_in_background(proc)
+
+# Single worker, so cleanups run one at a time and in order
+_OUTDIR_GC = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="outdir-gc")
+
+def _clean_outdir():
+    with os.scandir(OUTDIR) as entries:
+        for entry in entries:
+            try: os.unlink(entry.path)
+            except OSError: pass
+
 def clean_outdir():
-    """Clean output directory completely."""
-    for p in pathlib.Path(OUTDIR).glob("*"):
-        try: p.unlink()
-        except: pass
+    """Clean output directory completely, in the background so callers holding LOCK don't wait on the filesystem."""
+    _OUTDIR_GC.submit(_clean_outdir)
 
 def stop_to_idle():
     """Stop FFmpeg completely and enter idle mode (zero GPU usage)."""
-    global PROC, MODE, CUR_IN1, CUR_IN2, CUR_AUDIO_MODE, LAST_HIT, CUR_LAYOUT, CUR_INPUTS, CUR_AUDIO_INDEX, CUR_CUSTOM_SLOTS, CURRENT_LAYOUT, LAST_LAYOUT
+    global PROC, MODE, CUR_IN1, CUR_IN2, LAST_HIT_NS, CUR_LAYOUT, CUR_INPUTS, CUR_AUDIO_INDEX, CUR_CUSTOM_SLOTS, CURRENT_LAYOUT, _CURRENT_LAYOUT_JSON, LAST_LAYOUT, _LAST_LAYOUT_JSON
 
     # Save current layout to LAST_LAYOUT before clearing (for cold start)
     with CURRENT_LAYOUT_LOCK:
         if CURRENT_LAYOUT:
             with LAST_LAYOUT_LOCK:
                 LAST_LAYOUT = CURRENT_LAYOUT.copy()
+                _LAST_LAYOUT_JSON = None
                 print(f"Saved layout '{LAST_LAYOUT.get('layout')}' for cold start")
 
     with LOCK:
@@ -800,69 +1319,98 @@ def stop_to_idle():
         # CUR_LAYOUT, CUR_INPUTS, etc. stay populated for restart_last_layout()
         # Legacy vars cleared
         CUR_IN1 = CUR_IN2 = None
-        CUR_AUDIO_MODE = 0
-        LAST_HIT = time.time()
+        LAST_HIT_NS = time.monotonic_ns()
 
     # Clear current layout state (but LAST_LAYOUT persists)
     with CURRENT_LAYOUT_LOCK:
         CURRENT_LAYOUT = None
+        _CURRENT_LAYOUT_JSON = None
 
     print(f"Entered idle mode (no FFmpeg process, layout saved for cold start)")
 
 def start_black():
     """Legacy black screen mode - kept for compatibility."""
-    global PROC, LAST_HIT, MODE, CUR_IN1, CUR_IN2, CUR_AUDIO_MODE, CUR_LAYOUT, CUR_INPUTS, CUR_AUDIO_INDEX, CUR_CUSTOM_SLOTS, CURRENT_LAYOUT
+    global PROC, LAST_HIT_NS, MODE, CUR_IN1, CUR_IN2, CUR_LAYOUT, CUR_INPUTS, CUR_AUDIO_INDEX, CUR_CUSTOM_SLOTS, CURRENT_LAYOUT, _CURRENT_LAYOUT_JSON
     with LOCK:
         stop_ffmpeg()
         clean_outdir()
         # Capture stdout for broadcasting to HTTP clients
-        PROC = subprocess.Popen(
-            build_black_cmd(),
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            bufsize=0
-        )
+        PROC = spawn_ffmpeg(_BLACK_CMD)
         MODE = "black"
+        _notify_proc_started()
         CUR_IN1 = CUR_IN2 = None
-        CUR_AUDIO_MODE = 0
         CUR_LAYOUT = None
         CUR_INPUTS = []
         CUR_AUDIO_INDEX = 0
         CUR_CUSTOM_SLOTS = None
-        LAST_HIT = time.time()
+        LAST_HIT_NS = time.monotonic_ns()
     # Clear current layout when stopping
     with CURRENT_LAYOUT_LOCK:
         CURRENT_LAYOUT = None
+        _CURRENT_LAYOUT_JSON = None
 
 def start_live(in1: str, in2: str):
-    global PROC, LAST_HIT, MODE, CUR_IN1, CUR_IN2
+    global PROC, LAST_HIT_NS, MODE, CUR_IN1, CUR_IN2
+    inputs = {"__IN1__": in1, "__IN2__": in2}
+    cmd = [inputs.get(arg, arg) for arg in _LIVE_CMD_TEMPLATE]
     with LOCK:
         stop_ffmpeg()
         clean_outdir()
         # Capture stdout for broadcasting to HTTP clients
-        PROC = subprocess.Popen(
-            build_live_cmd(in1, in2, AUDIO_SOURCE),
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            bufsize=0
-        )
+        PROC = spawn_ffmpeg(cmd)
         MODE = "live"
+        _notify_proc_started()
         CUR_IN1, CUR_IN2 = in1, in2
-        LAST_HIT = time.time()
-
-def get_expected_slots_for_layout(layout: str) -> list:
-    """Return the expected slot IDs for a given layout type."""
-    LAYOUT_SLOTS = {
-        'pip': ['main', 'inset'],
-        'dvd_pip': ['main', 'inset'],
-        'split_h': ['left', 'right'],
-        'split_v': ['top', 'bottom'],
-        'grid_2x2': ['slot1', 'slot2', 'slot3', 'slot4'],
-        'multi_pip_2': ['main', 'inset1', 'inset2'],
-        'multi_pip_3': ['main', 'inset1', 'inset2', 'inset3'],
-        'multi_pip_4': ['main', 'inset1', 'inset2', 'inset3', 'inset4'],
+        LAST_HIT_NS = time.monotonic_ns()
+
+# Slot order for each layout type (must match filter builders / input order)
+LAYOUT_SLOTS = {
+    'pip': ('main', 'inset'),
+    'dvd_pip': ('main', 'inset'),
+    'split_h': ('left', 'right'),
+    'split_v': ('top', 'bottom'),
+    'grid_2x2': ('slot1', 'slot2', 'slot3', 'slot4'),
+    'multi_pip_2': ('main', 'inset1', 'inset2'),
+    'multi_pip_3': ('main', 'inset1', 'inset2', 'inset3'),
+    'multi_pip_4': ('main', 'inset1', 'inset2', 'inset3', 'inset4'),
+}
+# layout -> {slot id: input index}
+LAYOUT_SLOT_INDEX = {layout: {slot: i for i, slot in enumerate(slots)} for layout, slots in LAYOUT_SLOTS.items()}
+
+def layout_slot_index(layout: str, custom_slots: list = None) -> dict:
+    """
+    Map each slot of a layout to its FFmpeg input index.
+
+    Custom layouts order their inputs by slot area, largest first (for
+    z-ordering); that ordering is cached per slot geometry. The returned dict
+    is shared and must not be modified.
+    """
+    if layout == 'custom':
+        return _custom_slot_index(tuple((slot['id'], slot['width'] * slot['height']) for slot in custom_slots or ()))
+    return LAYOUT_SLOT_INDEX.get(layout, {})
+
+@functools.lru_cache(maxsize=64)
+def _custom_slot_index(slot_areas: tuple) -> dict:
+    """Build layout_slot_index() for custom slots given as (id, area) pairs."""
+    ordered = sorted(slot_areas, key=lambda slot: slot[1], reverse=True)
+    return {slot_id: i for i, (slot_id, _) in enumerate(ordered)}
+
+def slot_vols_to_index(audio_volumes: dict, slot_index: dict) -> dict:
+    """
+    Convert slot-keyed volumes to the input-indexed form build_layout_cmd takes.
+
+    Args:
+        audio_volumes: slotId -> volume (0.0-1.0)
+        slot_index: slotId -> input index, e.g. from LAYOUT_SLOT_INDEX
+
+    Returns:
+        Dict mapping input index to volume; slots not in the layout are dropped
+    """
+    return {
+        slot_index[slot_id]: volume
+        for slot_id, volume in audio_volumes.items()
+        if slot_id in slot_index
     }
-    return LAYOUT_SLOTS.get(layout, [])
 
 def ensure_running():
     """Legacy: ensure FFmpeg is running - now starts in idle mode instead."""
@@ -872,7 +1420,7 @@ def ensure_running():
 
 def restart_last_layout():
     """Restart FFmpeg with the last known layout configuration."""
-    global PROC, MODE, LAST_HIT, CUR_LAYOUT, CUR_INPUTS, CUR_AUDIO_INDEX, CUR_IN1, CUR_IN2, CUR_AUDIO_MODE, CUR_CUSTOM_SLOTS
+    global PROC, MODE, LAST_HIT_NS, CUR_LAYOUT, CUR_INPUTS, CUR_AUDIO_INDEX, CUR_IN1, CUR_IN2, CUR_CUSTOM_SLOTS
 
     if not CUR_LAYOUT or not CUR_INPUTS:
         print("Cannot restart: no layout configured")
@@ -885,35 +1433,21 @@ def restart_last_layout():
     # Convert slot-based volumes to index-based volumes
     audio_volumes_by_index = {}
     if audio_volumes and CURRENT_LAYOUT:
-        # Get expected slots - handle custom layouts
-        if CUR_LAYOUT == 'custom' and CUR_CUSTOM_SLOTS:
-            sorted_slots = sorted(CUR_CUSTOM_SLOTS, key=lambda s: s['width'] * s['height'], reverse=True)
-            expected_slots = [slot['id'] for slot in sorted_slots]
-        else:
-            expected_slots = get_expected_slots_for_layout(CUR_LAYOUT)
-
-        for slot_id, channel_id in CURRENT_LAYOUT.get("streams", {}).items():
-            if slot_id in audio_volumes and slot_id in expected_slots:
-                index = expected_slots.index(slot_id)
-                audio_volumes_by_index[index] = audio_volumes[slot_id]
+        slot_index = layout_slot_index(CUR_LAYOUT, CUR_CUSTOM_SLOTS)
+        audio_volumes_by_index = slot_vols_to_index(audio_volumes, slot_index)
 
     try:
         with LOCK:
             stop_ffmpeg()
             clean_outdir()
 
-            PROC = subprocess.Popen(
-                build_layout_cmd(CUR_LAYOUT, CUR_INPUTS, CUR_AUDIO_INDEX, CUR_CUSTOM_SLOTS, audio_volumes_by_index),
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                bufsize=0
-            )
+            PROC = spawn_ffmpeg(build_layout_cmd(CUR_LAYOUT, CUR_INPUTS, CUR_AUDIO_INDEX, CUR_CUSTOM_SLOTS, audio_volumes_by_index))
             MODE = "live"
-            # Update legacy vars for backward compatibility
+            _notify_proc_started()
+            # Keep /control/swap and status in1/in2 in step
             if len(CUR_INPUTS) >= 2:
                 CUR_IN1, CUR_IN2 = CUR_INPUTS[0], CUR_INPUTS[1]
-                CUR_AUDIO_MODE = CUR_AUDIO_INDEX if CUR_AUDIO_INDEX in [0, 1] else 0
-            LAST_HIT = time.time()
+            LAST_HIT_NS = time.monotonic_ns()
 
         print(f"Restarted layout '{CUR_LAYOUT}' with {len(CUR_INPUTS)} streams")
         return True
@@ -921,81 +1455,36 @@ def restart_last_layout():
         print(f"Failed to restart layout: {e}")
         return False
 
-def restart_current_stream():
-    """Restart FFmpeg with the same settings to prevent file size growth."""
-    global MODE, CUR_IN1, CUR_IN2, CUR_AUDIO_MODE, CUR_LAYOUT, CUR_INPUTS, CUR_AUDIO_INDEX, CUR_CUSTOM_SLOTS, PROC, LAST_HIT
-    if MODE == "black":
-        start_black()
-    elif MODE == "live":
-        # Use new layout system if available, otherwise fall back to legacy
-        if CUR_LAYOUT and CUR_INPUTS:
-            # Get audio_volumes from current layout
-            with CURRENT_LAYOUT_LOCK:
-                audio_volumes = CURRENT_LAYOUT.get("audio_volumes", {}) if CURRENT_LAYOUT else {}
-
-            # Convert slot-based volumes to index-based volumes
-            audio_volumes_by_index = {}
-            if audio_volumes and CURRENT_LAYOUT:
-                # Get expected slots - handle custom layouts
-                if CUR_LAYOUT == 'custom' and CUR_CUSTOM_SLOTS:
-                    sorted_slots = sorted(CUR_CUSTOM_SLOTS, key=lambda s: s['width'] * s['height'], reverse=True)
-                    expected_slots = [slot['id'] for slot in sorted_slots]
-                else:
-                    expected_slots = get_expected_slots_for_layout(CUR_LAYOUT)
+def idle_watchdog():
+    """
+    Enter idle mode once no client has been connected for IDLE_TIMEOUT seconds.
+    Sleeps until the client count or stream state changes instead of polling.
+    """
+    while True:
+        IDLE_STATE_CHANGED.wait()
+        IDLE_STATE_CHANGED.clear()
 
-                for slot_id, channel_id in CURRENT_LAYOUT.get("streams", {}).items():
-                    if slot_id in audio_volumes and slot_id in expected_slots:
-                        index = expected_slots.index(slot_id)
-                        audio_volumes_by_index[index] = audio_volumes[slot_id]
+        # Client tuple is copy-on-write, so its length can be read without the lock
+        client_count = len(BROADCAST_CLIENTS)
 
-            with LOCK:
-                stop_ffmpeg()
-                clean_outdir()
-
-                PROC = subprocess.Popen(
-                    build_layout_cmd(CUR_LAYOUT, CUR_INPUTS, CUR_AUDIO_INDEX, CUR_CUSTOM_SLOTS, audio_volumes_by_index),
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    bufsize=0
-                )
-                MODE = "live"
-                LAST_HIT = time.time()
-        elif CUR_IN1 and CUR_IN2:
-            # Legacy restart
-            with LOCK:
-                stop_ffmpeg()
-                clean_outdir()
-
-                PROC = subprocess.Popen(
-                    build_live_cmd(CUR_IN1, CUR_IN2, CUR_AUDIO_MODE),
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    bufsize=0
-                )
-                MODE = "live"
-                LAST_HIT = time.time()
+        if client_count or MODE != "live":
+            continue
 
-def idle_watchdog():
-    global MODE, LAST_CLIENT_DISCONNECT
-    while True:
-        time.sleep(5)
-
-        # Get current client count
-        with BROADCAST_LOCK:
-            client_count = len(BROADCAST_CLIENTS)
-
-        # Track when last client disconnected
-        if client_count == 0 and MODE == "live":
-            if LAST_CLIENT_DISCONNECT == 0:
-                LAST_CLIENT_DISCONNECT = time.time()
-            elif time.time() - LAST_CLIENT_DISCONNECT > IDLE_TIMEOUT:
-                print(f"No clients for {IDLE_TIMEOUT}s, entering idle mode")
-                stop_to_idle()
-                LAST_CLIENT_DISCONNECT = 0
-        else:
-            LAST_CLIENT_DISCONNECT = 0  # Reset when clients are connected
+        # No clients: go idle unless something changes within the timeout
+        if not IDLE_STATE_CHANGED.wait(timeout=IDLE_TIMEOUT):
+            print(f"No clients for {IDLE_TIMEOUT}s, entering idle mode")
+            stop_to_idle()
 
-        # Note: HLS segments auto-delete old content, no file size monitoring needed
+# 349 TS packets = 65612 bytes, the packet-aligned size closest to 64 KiB
+TS_READ_SIZE = 188 * 349
+
+def end_client_streams():
+    """Tell every connected /stream client that the stream has ended."""
+    for client in BROADCAST_CLIENTS:
+        try:
+            client.loop.call_soon_threadsafe(client.offer, None)
+        except RuntimeError:
+            pass  # Event loop already closed
 
 def broadcast_reader():
     """
@@ -1005,53 +1494,91 @@ def broadcast_reader():
     global PROC, BROADCAST_CLIENTS
 
     while True:
-        if PROC and PROC.stdout and PROC.poll() is None:
+        proc = PROC
+        # Read until EOF even if the process has already exited: its last
+        # chunks may still be in the pipe, and EOF is where clients are ended
+        if proc and proc.stdout:
             try:
-                # Read chunk from FFmpeg stdout
+                # Read chunk from FFmpeg stdout; blocks until data or EOF
                 # MPEG-TS packets are 188 bytes, read multiples for efficiency
-                chunk = PROC.stdout.read(188 * 20)  # 3760 bytes
+                chunk = proc.stdout.read(TS_READ_SIZE)
 
                 if chunk:
+                    # Leftovers from a replaced process don't count as the new one's output
+                    if proc is PROC and not FIRST_CHUNK.is_set():
+                        FIRST_CHUNK.set()
+
                     # Broadcast to all connected clients
-                    with BROADCAST_LOCK:
-                        dead_clients = []
-                        for client_queue in BROADCAST_CLIENTS.copy():
-                            try:
-                                # Non-blocking put with size limit to prevent memory issues
-                                if client_queue.qsize() < 100:  # Max 100 chunks buffered
-                                    client_queue.put_nowait(chunk)
-                                else:
-                                    # Client is too slow, disconnect them
-                                    dead_clients.append(client_queue)
-                            except queue.Full:
-                                dead_clients.append(client_queue)
-                            except Exception as e:
-                                print(f"Error broadcasting to client: {e}")
-                                dead_clients.append(client_queue)
-
-                        # Remove dead clients
-                        for dead in dead_clients:
-                            BROADCAST_CLIENTS.discard(dead)
+                    dead_clients = []
+                    for client in BROADCAST_CLIENTS:
+                        try:
+                            client.loop.call_soon_threadsafe(client.offer, chunk)
+                        except RuntimeError:
+                            # Event loop already closed
+                            dead_clients.append(client)
+
+                    # Remove dead clients
+                    if dead_clients:
+                        with BROADCAST_LOCK:
+                            BROADCAST_CLIENTS = tuple(c for c in BROADCAST_CLIENTS if c not in dead_clients)
+                        IDLE_STATE_CHANGED.set()
                 else:
-                    # No data, wait a bit
-                    time.sleep(0.01)
+                    # EOF: this FFmpeg exited or was replaced. Restarts swap PROC
+                    # within one LOCK hold, so once LOCK is free a PROC that is
+                    # still this process (or None) means the stream has ended.
+                    with LOCK:
+                        ended = PROC is proc or PROC is None
+                    if ended:
+                        # Release a cold start waiting for output that won't come
+                        FIRST_CHUNK.set()
+                        end_client_streams()
+
+                    # Sleep until a new process is published instead of spinning
+                    # on the dead pipe; clear first so a swap that already
+                    # happened is not missed.
+                    PROC_STARTED.clear()
+                    if PROC is proc:
+                        PROC_STARTED.wait()
             except Exception as e:
                 print(f"Broadcast reader error: {e}")
                 time.sleep(0.1)
         else:
-            # No active process, wait
-            time.sleep(0.5)
+            # No process, block until one is started.
+            # Clear before re-checking PROC so a start between the check and
+            # the wait is never missed.
+            PROC_STARTED.clear()
+            if PROC:
+                continue
+            PROC_STARTED.wait()
 
 threading.Thread(target=idle_watchdog, daemon=True).start()
 threading.Thread(target=broadcast_reader, daemon=True).start()
 
 @app.on_event("startup")
-def boot():
-    load_channels()  # Load channels on startup
+async def boot():
+    _LOG_LISTENER.start()
+    # asyncio.to_thread (cold starts, layout swaps, playlist fetches) runs on the default executor
+    asyncio.get_running_loop().set_default_executor(
+        concurrent.futures.ThreadPoolExecutor(max_workers=THREAD_POOL_SIZE, thread_name_prefix="blocking")
+    )
+    # Shared async client for /api/proxy-image (keeps icon hosts' connections alive)
+    app.state.http = httpx.AsyncClient(
+        timeout=5.0,
+        headers={"User-Agent": DEFAULT_UA},
+        limits=httpx.Limits(max_connections=64, max_keepalive_connections=16),
+        follow_redirects=True,
+    )
+    await asyncio.to_thread(load_channels)  # Load channels on startup
     # Start in idle mode (no FFmpeg process until first client connects)
 
+@app.on_event("shutdown")
+async def shutdown():
+    await app.state.http.aclose()
+    HTTP.close()
+    _LOG_LISTENER.stop()
+
 @app.get("/")
-async def home(in1: str | None = None, in2: str | None = None):
+def home(in1: str | None = None, in2: str | None = None):
     if in1 and in2:
         start_live(in1, in2)
         return RedirectResponse(url="/stream", status_code=302)
@@ -1066,7 +1593,7 @@ async def home(in1: str | None = None, in2: str | None = None):
     )
 
 @app.get("/control/start")
-async def control_start(in1: str, in2: str):
+def control_start(in1: str, in2: str):
     start_live(in1, in2)
     port = os.getenv('PORT', '9292')
     return JSONResponse({
@@ -1075,12 +1602,12 @@ async def control_start(in1: str, in2: str):
     })
 
 @app.get("/control/stop")
-async def control_stop():
+def control_stop():
     stop_to_idle()
     return {"status":"idle"}
 
 @app.get("/control/swap")
-async def control_swap():
+def control_swap():
     global CUR_IN1, CUR_IN2
     if not (CUR_IN1 and CUR_IN2):
         return {"status":"no-live-stream","hint":"start first with /control/start?in1=..&in2=.."}
@@ -1088,46 +1615,66 @@ async def control_swap():
     start_live(CUR_IN1, CUR_IN2)
     return {"status":"swapped"}
 
+def encode_layout(layout: dict) -> bytes:
+    """Compact JSON encoding used for the cached layout bodies."""
+    return json.dumps(layout, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+# Fields of /control/status that never change after startup
+_STATUS_TAIL = (
+    ',"encoder":' + json.dumps({
+        "type": SELECTED_ENCODER,
+        "name": SELECTED_ENCODER_CONFIG['name'],
+        "codec": SELECTED_ENCODER_CONFIG['codec'],
+        "preference": ENCODER_PREFERENCE
+    }, ensure_ascii=False, separators=(",", ":"))
+    + ',"stream_url":' + json.dumps(f"http://localhost:{os.getenv('PORT', '9292')}/stream")
+    + '}'
+).encode("utf-8")
+
 @app.get("/control/status")
 async def status():
+    global _CURRENT_LAYOUT_JSON, _LAST_LAYOUT_JSON
     running = PROC is not None and PROC.poll() is None
-    port = os.getenv('PORT', '9292')
 
-    # Get connected client count
-    with BROADCAST_LOCK:
-        client_count = len(BROADCAST_CLIENTS)
+    # Get connected client count (copy-on-write tuple, no lock needed)
+    client_count = len(BROADCAST_CLIENTS)
 
     # Calculate time until idle timeout
-    time_since_hit = time.time() - LAST_HIT
+    time_since_hit = (time.monotonic_ns() - LAST_HIT_NS) / 1_000_000_000
     time_until_timeout = max(0, IDLE_TIMEOUT - time_since_hit)
+    last_hit_epoch = time.time() - time_since_hit if LAST_HIT_NS else 0.0
 
-    # Get current layout
+    # Layouts are encoded once per change (writers clear the caches) and
+    # spliced in, instead of copying and re-serializing them on every poll
     with CURRENT_LAYOUT_LOCK:
-        current_layout = CURRENT_LAYOUT.copy() if CURRENT_LAYOUT else None
+        if _CURRENT_LAYOUT_JSON is None and CURRENT_LAYOUT is not None:
+            _CURRENT_LAYOUT_JSON = encode_layout(CURRENT_LAYOUT)
+        current_layout = _CURRENT_LAYOUT_JSON or b"null"
 
-    # Get last layout (for cold start info)
+    # Last layout (for cold start info)
     with LAST_LAYOUT_LOCK:
-        last_layout = LAST_LAYOUT.copy() if LAST_LAYOUT else None
+        if _LAST_LAYOUT_JSON is None and LAST_LAYOUT is not None:
+            _LAST_LAYOUT_JSON = encode_layout(LAST_LAYOUT)
+        last_layout = _LAST_LAYOUT_JSON or b"null"
 
-    return {
+    head = json.dumps({
         "proc_running": running,
         "mode": MODE,
         "in1": CUR_IN1,
         "in2": CUR_IN2,
         "idle_timeout_sec": IDLE_TIMEOUT,
-        "last_hit_epoch": LAST_HIT,
+        "last_hit_epoch": last_hit_epoch,
         "time_until_idle": int(time_until_timeout),
         "connected_clients": client_count,
-        "current_layout": current_layout,
-        "last_layout": last_layout,  # Layout that will be restored on cold start
-        "encoder": {
-            "type": SELECTED_ENCODER,
-            "name": SELECTED_ENCODER_CONFIG['name'],
-            "codec": SELECTED_ENCODER_CONFIG['codec'],
-            "preference": ENCODER_PREFERENCE
-        },
-        "stream_url": f"http://localhost:{port}/stream",
-    }
+        "ffmpeg_log": list(FFMPEG_LOG_TAIL),  # Latest FFmpeg warnings/errors
+    }, ensure_ascii=False, separators=(",", ":"))[:-1].encode("utf-8")
+
+    return Response(
+        head + b',"current_layout":' + current_layout
+        + b',"last_layout":' + last_layout  # Layout that will be restored on cold start
+        + _STATUS_TAIL,
+        media_type="application/json",
+    )
 
 @app.get("/stream")
 async def stream():
@@ -1136,8 +1683,8 @@ async def stream():
     Each client starts receiving from the current live point.
     Multiple clients can connect simultaneously.
     """
-    global LAST_HIT, BROADCAST_CLIENTS, MODE, LAST_LAYOUT, CURRENT_LAYOUT, CUR_LAYOUT, CUR_INPUTS, CUR_AUDIO_INDEX, CUR_CUSTOM_SLOTS, PROC
-    LAST_HIT = time.time()
+    global LAST_HIT_NS, BROADCAST_CLIENTS, MODE, LAST_LAYOUT, CURRENT_LAYOUT, _CURRENT_LAYOUT_JSON, CUR_LAYOUT, CUR_INPUTS, CUR_AUDIO_INDEX, CUR_CUSTOM_SLOTS, PROC
+    LAST_HIT_NS = time.monotonic_ns()
 
     # Start FFmpeg on-demand if in idle mode (cold start)
     # Use LOCK to prevent race conditions with multiple simultaneous stream requests
@@ -1165,6 +1712,7 @@ async def stream():
             # Restore layout state from saved copy
             with CURRENT_LAYOUT_LOCK:
                 CURRENT_LAYOUT = saved_layout.copy()
+                _CURRENT_LAYOUT_JSON = None
 
             # Extract layout parameters for restart
             layout_type = saved_layout.get("layout")
@@ -1172,19 +1720,16 @@ async def stream():
             audio_volumes = saved_layout.get("audio_volumes", {})
             custom_slots = saved_layout.get("custom_slots")
 
-            # Build input URLs in correct order
-            if layout_type == 'custom' and custom_slots:
-                sorted_slots = sorted(custom_slots, key=lambda s: s['width'] * s['height'], reverse=True)
-                expected_slots = [slot['id'] for slot in sorted_slots]
-            else:
-                expected_slots = get_expected_slots_for_layout(layout_type)
+            # Build input URLs in correct order (slot_index iterates in input order)
+            slot_index = layout_slot_index(layout_type, custom_slots)
 
             # Get channel URLs
+            channels_by_id = CHANNELS_BY_ID  # One index snapshot for every slot
             input_urls = []
-            for slot_id in expected_slots:
+            for slot_id in slot_index:
                 channel_id = streams.get(slot_id)
                 if channel_id:
-                    channel = get_channel_by_id(channel_id)
+                    channel = channels_by_id.get(channel_id)
                     if channel:
                         input_urls.append(channel['url'])
 
@@ -1194,15 +1739,10 @@ async def stream():
                 raise HTTPException(status_code=503, detail="No valid channel URLs found")
 
             # Find audio index
-            audio_source = saved_layout.get("audio_source")
-            audio_index = expected_slots.index(audio_source) if audio_source in expected_slots else 0
+            audio_index = slot_index.get(saved_layout.get("audio_source"), 0)
 
             # Convert slot-based audio volumes to index-based
-            audio_volumes_by_index = {}
-            for slot_id, volume in audio_volumes.items():
-                if slot_id in expected_slots:
-                    idx = expected_slots.index(slot_id)
-                    audio_volumes_by_index[idx] = volume
+            audio_volumes_by_index = slot_vols_to_index(audio_volumes, slot_index)
 
             # Build custom slots for ffmpeg if needed
             custom_slots_for_ffmpeg = None
@@ -1210,28 +1750,30 @@ async def stream():
                 custom_slots_for_ffmpeg = sorted(custom_slots, key=lambda s: s['width'] * s['height'], reverse=True)
 
             # Start FFmpeg directly (don't use restart_last_layout to avoid complexity)
-            with LOCK:
-                stop_ffmpeg()
-                clean_outdir()
-
-                PROC = subprocess.Popen(
-                    build_layout_cmd(layout_type, input_urls, audio_index, custom_slots_for_ffmpeg, audio_volumes_by_index),
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    bufsize=0
-                )
-                MODE = "live"
-                CUR_LAYOUT = layout_type
-                CUR_INPUTS = input_urls
-                CUR_AUDIO_INDEX = audio_index
-                CUR_CUSTOM_SLOTS = custom_slots_for_ffmpeg
-                LAST_HIT = time.time()
+            def cold_start():
+                global PROC, MODE, CUR_LAYOUT, CUR_INPUTS, CUR_AUDIO_INDEX, CUR_CUSTOM_SLOTS, LAST_HIT_NS
+                with LOCK:
+                    stop_ffmpeg()
+                    clean_outdir()
+
+                    PROC = spawn_ffmpeg(build_layout_cmd(layout_type, input_urls, audio_index, custom_slots_for_ffmpeg, audio_volumes_by_index))
+                    MODE = "live"
+                    _notify_proc_started()
+                    CUR_LAYOUT = layout_type
+                    CUR_INPUTS = input_urls
+                    CUR_AUDIO_INDEX = audio_index
+                    CUR_CUSTOM_SLOTS = custom_slots_for_ffmpeg
+                    LAST_HIT_NS = time.monotonic_ns()
+
+            # stop_ffmpeg() can wait for the old process; keep the event loop free meanwhile
+            await asyncio.to_thread(cold_start)
 
             print(f"Cold start successful: layout '{layout_type}' with {len(input_urls)} streams")
 
-            # Wait for FFmpeg to stabilize and start producing MPEG-TS output
-            # Streams need time to connect, buffer, and begin encoding
-            await asyncio.sleep(5)
+            # Wait for FFmpeg to start producing MPEG-TS output (or exit);
+            # streams need time to connect, buffer, and begin encoding
+            if not await asyncio.to_thread(FIRST_CHUNK.wait, 10.0):
+                print("Cold start: no output from FFmpeg after 10s, serving anyway")
 
             # Check if FFmpeg is still running
             if not PROC or PROC.poll() is not None:
@@ -1240,45 +1782,54 @@ async def stream():
                 raise HTTPException(status_code=503, detail="FFmpeg process died during cold start")
 
         except Exception as e:
-            import traceback
-            traceback.print_exc()
+            log.exception("Cold start failed")
             with LOCK:
                 MODE = "idle"
             raise HTTPException(status_code=503, detail=f"Cold start failed: {str(e)}")
 
-    # Create a queue for this client (threading.Queue, not asyncio)
-    client_queue = queue.Queue(maxsize=100)
+    # Create a queue for this client, fed on this event loop by the broadcaster
+    client = BroadcastClient(asyncio.get_running_loop())
 
     # Register this client with the broadcaster
     with BROADCAST_LOCK:
-        BROADCAST_CLIENTS.add(client_queue)
+        BROADCAST_CLIENTS = BROADCAST_CLIENTS + (client,)
+    IDLE_STATE_CHANGED.set()
+
+    # The reader only announces the end of the stream to clients registered
+    # at the time, so don't wait on a process that's already gone
+    # (another request's cold start will still publish one). Checked under
+    # LOCK so a restart mid-swap isn't mistaken for the end, in a worker
+    # thread since a graceful stop can hold LOCK for seconds.
+    def stream_already_ended():
+        with LOCK:
+            return MODE != "starting" and (not PROC or PROC.poll() is not None)
+
+    if await asyncio.to_thread(stream_already_ended):
+        client.offer(None)
 
     async def generate():
-        global LAST_HIT, PROC
+        global LAST_HIT_NS, PROC, BROADCAST_CLIENTS
         try:
             while True:
-                # Wait for data from the broadcaster (blocking with timeout)
-                try:
-                    # Use run_in_executor to make blocking queue.get() non-blocking for asyncio
-                    loop = asyncio.get_event_loop()
-                    chunk = await loop.run_in_executor(
-                        None,
-                        lambda: client_queue.get(timeout=1.0)
-                    )
-                    # Update LAST_HIT to prevent idle timeout while client is actively streaming
-                    LAST_HIT = time.time()
-                    yield chunk
-                except queue.Empty:
-                    # No data for 1 second, check if process is still alive
-                    if not PROC or PROC.poll() is not None:
-                        break
-                    continue
+                # Wait for data from the broadcaster; None means FFmpeg stopped
+                chunk = await client.queue.get()
+                if chunk is None:
+                    break
+                # Update LAST_HIT_NS to prevent idle timeout while client is actively streaming;
+                # chunks arrive many times a second, so refresh it at most every LAST_HIT_RESOLUTION_NS
+                now = time.monotonic_ns()
+                if now - LAST_HIT_NS > LAST_HIT_RESOLUTION_NS:
+                    LAST_HIT_NS = now
+                yield chunk
         except Exception as e:
             print(f"Client stream error: {e}")
         finally:
             # Unregister this client
             with BROADCAST_LOCK:
-                BROADCAST_CLIENTS.discard(client_queue)
+                BROADCAST_CLIENTS = tuple(c for c in BROADCAST_CLIENTS if c is not client)
+            IDLE_STATE_CHANGED.set()
+            if client.skipped:
+                print(f"Stream client fell behind, skipped {client.skipped} chunks")
 
     return StreamingResponse(
         generate(),
@@ -1295,16 +1846,21 @@ async def stream():
 @app.get("/api/channels")
 async def get_channels():
     """Return list of available channels from M3U."""
+    global _CHANNELS_JSON
     with CHANNELS_LOCK:
-        return {
-            "channels": CHANNELS,
-            "count": len(CHANNELS),
-        }
+        # Encoded once per channel list; load_channels() clears it
+        if _CHANNELS_JSON is None:
+            _CHANNELS_JSON = json.dumps(
+                {"channels": CHANNELS, "count": len(CHANNELS)},
+                ensure_ascii=False, separators=(",", ":"),
+            ).encode("utf-8")
+        return Response(_CHANNELS_JSON, media_type="application/json")
 
 @app.post("/api/channels/refresh")
 async def refresh_channels():
     """Re-fetch and re-parse M3U file."""
-    load_channels()
+    # Fetch and parse off the event loop so streams keep flowing meanwhile
+    await asyncio.to_thread(load_channels)
     with CHANNELS_LOCK:
         return {
             "channels": CHANNELS,
@@ -1312,34 +1868,60 @@ async def refresh_channels():
             "message": "Channels refreshed successfully",
         }
 
+# Recently proxied icons: url -> (fetched_at, content, content_type), oldest first.
+# Only touched from the event loop, so no lock.
+IMAGE_CACHE: "OrderedDict[str, tuple]" = OrderedDict()
+IMAGE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+IMAGE_CACHE_TTL = 3600  # seconds
+_image_cache_bytes = 0
+
+def cache_image(url: str, content: bytes, content_type: str):
+    """Store a fetched icon, evicting least recently used ones past IMAGE_CACHE_MAX_BYTES."""
+    global _image_cache_bytes
+    if len(content) > IMAGE_CACHE_MAX_BYTES:
+        return
+    old = IMAGE_CACHE.pop(url, None)
+    if old:
+        _image_cache_bytes -= len(old[1])
+    IMAGE_CACHE[url] = (time.monotonic(), content, content_type)
+    _image_cache_bytes += len(content)
+    while _image_cache_bytes > IMAGE_CACHE_MAX_BYTES:
+        _, (_, evicted, _) = IMAGE_CACHE.popitem(last=False)
+        _image_cache_bytes -= len(evicted)
+
 @app.get("/api/proxy-image")
 async def proxy_image(url: str):
     """
     Proxy channel icons from internal Docker networks to the frontend.
     This allows browser clients to access images at host.docker.internal URLs.
     """
-    try:
-        # Fetch the image from the internal URL
-        req = UrlRequest(url, headers={'User-Agent': DEFAULT_UA})
-        with urlopen(req, timeout=5) as response:
-            image_data = response.read()
-            content_type = response.headers.get('Content-Type', 'image/jpeg')
+    cached = IMAGE_CACHE.get(url)
+    if cached and time.monotonic() - cached[0] < IMAGE_CACHE_TTL:
+        IMAGE_CACHE.move_to_end(url)
+        return Response(
+            content=cached[1],
+            media_type=cached[2],
+            headers={"Cache-Control": "public, max-age=86400"},
+        )
 
-        return Response(content=image_data, media_type=content_type)
+    try:
+        # Fetch the image from the internal URL without blocking the event loop
+        response = await app.state.http.get(url)
+        response.raise_for_status()
+        content_type = response.headers.get('Content-Type', 'image/jpeg')
+        cache_image(url, response.content, content_type)
+
+        return Response(
+            content=response.content,
+            media_type=content_type,
+            headers={"Cache-Control": "public, max-age=86400"},
+        )
     except Exception as e:
         print(f"Error proxying image {url}: {e}")
         raise HTTPException(status_code=404, detail="Image not found")
 
 # ========== Layout Management API ==========
 
-def get_channel_by_id(channel_id: str) -> dict | None:
-    """Look up channel by ID from CHANNELS list."""
-    with CHANNELS_LOCK:
-        for channel in CHANNELS:
-            if channel["id"] == channel_id:
-                return channel
-    return None
-
 @app.post("/api/layout/set")
 async def set_layout(config: LayoutConfigModel):
     """
@@ -1353,178 +1935,154 @@ async def set_layout(config: LayoutConfigModel):
     - audio_source: slotId providing audio
     - custom_slots: (for custom layouts) list of slot definitions
     """
-    global CURRENT_LAYOUT, PROC, LAST_HIT, MODE, CUR_IN1, CUR_IN2, CUR_AUDIO_MODE, CUR_LAYOUT, CUR_INPUTS, CUR_AUDIO_INDEX, CUR_CUSTOM_SLOTS
-
-    # Define slot order for each layout type (must match filter builders)
-    LAYOUT_SLOTS = {
-        'pip': ['main', 'inset'],
-        'dvd_pip': ['main', 'inset'],
-        'split_h': ['left', 'right'],
-        'split_v': ['top', 'bottom'],
-        'grid_2x2': ['slot1', 'slot2', 'slot3', 'slot4'],
-        'multi_pip_2': ['main', 'inset1', 'inset2'],
-        'multi_pip_3': ['main', 'inset1', 'inset2', 'inset3'],
-        'multi_pip_4': ['main', 'inset1', 'inset2', 'inset3', 'inset4'],
-    }
+    global _LAYOUT_REQUEST_SEQ, _LAYOUT_REQUEST_AT
 
     # Handle custom layouts
     if config.layout == 'custom':
-        if not config.custom_slots:
-            raise HTTPException(status_code=400, detail="Custom layout requires custom_slots")
-
-        # Validate custom slots
-        if len(config.custom_slots) < 1 or len(config.custom_slots) > 5:
-            raise HTTPException(status_code=400, detail="Custom layout must have 1-5 slots")
-
-        # Extract slot IDs from custom_slots
-        expected_slots = [slot['id'] for slot in config.custom_slots]
-
-        # Validate all required slots are assigned
-        for slot_id in expected_slots:
-            if slot_id not in config.streams:
-                raise HTTPException(status_code=400, detail=f"Custom layout requires slot '{slot_id}' to be assigned.")
-
-        # Validate audio_source is a valid slot
-        if config.audio_source not in expected_slots:
-            raise HTTPException(status_code=400, detail=f"Invalid audio_source: {config.audio_source}. Must be one of {expected_slots}.")
-
-        # Look up channel URLs in slot order (sorted by size for z-ordering)
+        # Slots, audio_source and slot count were validated by LayoutConfigModel
+        # Inputs are ordered by size for z-ordering
         sorted_slots = sorted(config.custom_slots, key=lambda s: s['width'] * s['height'], reverse=True)
-        sorted_slot_ids = [slot['id'] for slot in sorted_slots]
-
-        input_urls = []
-        channel_names = []
-        for slot_id in sorted_slot_ids:
-            channel_id = config.streams[slot_id]
-            channel = get_channel_by_id(channel_id)
-            if not channel:
-                raise HTTPException(status_code=404, detail=f"Channel not found: {channel_id}")
-            input_urls.append(channel['url'])
-            channel_names.append(channel['name'])
-
-        # Find audio index from audio_source slot (in sorted order)
-        audio_index = sorted_slot_ids.index(config.audio_source)
+        slot_index = layout_slot_index('custom', sorted_slots)
+        input_slots = list(slot_index)
 
         # Prepare custom slots for FFmpeg (sorted by size)
         custom_slots_for_ffmpeg = sorted_slots
 
     else:
-        # Validate layout type
-        if config.layout not in LAYOUT_SLOTS:
-            raise HTTPException(status_code=400, detail=f"Unknown layout type: {config.layout}")
-
-        expected_slots = LAYOUT_SLOTS[config.layout]
-
-        # Validate all required slots are assigned
-        for slot in expected_slots:
-            if slot not in config.streams:
-                raise HTTPException(status_code=400, detail=f"Layout '{config.layout}' requires slot '{slot}' to be assigned.")
-
-        # Validate audio_source is a valid slot
-        if config.audio_source not in expected_slots:
-            raise HTTPException(status_code=400, detail=f"Invalid audio_source: {config.audio_source}. Must be one of {expected_slots}.")
-
-        # Look up channel URLs in slot order
-        input_urls = []
-        channel_names = []
-        for slot in expected_slots:
-            channel_id = config.streams[slot]
-            channel = get_channel_by_id(channel_id)
-            if not channel:
-                raise HTTPException(status_code=404, detail=f"Channel not found: {channel_id}")
-            input_urls.append(channel['url'])
-            channel_names.append(channel['name'])
-
-        # Find audio index from audio_source slot
-        audio_index = expected_slots.index(config.audio_source)
+        # Layout type, slots and audio_source were validated by LayoutConfigModel
+        input_slots = LAYOUT_SLOTS[config.layout]
+        slot_index = LAYOUT_SLOT_INDEX[config.layout]
 
         custom_slots_for_ffmpeg = None
 
-    # Convert slot-based audio_volumes to index-based volumes
-    audio_volumes_by_index = {}
-    if config.audio_volumes:
-        for slot_id, volume in config.audio_volumes.items():
-            if slot_id in expected_slots:
-                index = expected_slots.index(slot_id)
-                audio_volumes_by_index[index] = volume
+    # Find audio index from audio_source slot (in input order)
+    audio_index = slot_index[config.audio_source]
+
+    streams = config.streams
+    channels_by_id = CHANNELS_BY_ID  # One index snapshot for every slot
+
+    # Report every unknown channel at once
+    missing = {streams[slot_id] for slot_id in input_slots} - channels_by_id.keys()
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Channels not found: {', '.join(sorted(missing))}")
+
+    # Look up channel URLs and names in input order, one pass over the slots
+    input_urls = []
+    streams_out = {}  # slotId -> channel name, for the response
+    for slot_id in input_slots:
+        channel = channels_by_id[streams[slot_id]]
+        input_urls.append(channel['url'])
+        streams_out[slot_id] = channel['name']
+
+    # Convert slot-based audio_volumes to index-based volumes (input order)
+    audio_volumes_by_index = slot_vols_to_index(config.audio_volumes or {}, slot_index)
 
     # Initialize default volumes for slots without explicit volumes
-    # First slot gets 1.0, others get 0.0 if not specified
-    for i, slot_id in enumerate(expected_slots):
-        if i not in audio_volumes_by_index:
-            # First slot defaults to 1.0 (100%), all others to 0.0 (muted)
-            if i == 0:
-                audio_volumes_by_index[i] = 1.0
-            else:
-                audio_volumes_by_index[i] = 0.0
+    # First slot defaults to 1.0 (100%), all others to 0.0 (muted)
+    for i in range(len(input_slots)):
+        audio_volumes_by_index.setdefault(i, 1.0 if i == 0 else 0.0)
+
+    # Slot-based config as it will be stored in CURRENT_LAYOUT; the model was
+    # validated once on the way in, so this is the only conversion
+    config_dict = config.model_dump()
+    # Store the converted index-based volumes back as slot-based for consistency
+    audio_volumes = config_dict["audio_volumes"] or {}
+    audio_volumes.update((input_slots[i], volume) for i, volume in audio_volumes_by_index.items())
+    config_dict["audio_volumes"] = audio_volumes
+
+    response = {
+        "status": "success",
+        "message": f"Layout '{config.layout}' started with {len(input_urls)} streams",
+        "audio_source": config.audio_source,
+        "streams": streams_out,
+        "audio_volumes": audio_volumes_by_index,
+    }
+
+    # Debounce bursts of layout changes: only the latest request restarts FFmpeg.
+    # An isolated change applies at once; one arriving within the window of the
+    # previous request waits it out in case the burst continues.
+    _LAYOUT_REQUEST_SEQ += 1
+    seq = _LAYOUT_REQUEST_SEQ
+    now = time.monotonic()
+    in_burst = now - _LAYOUT_REQUEST_AT < LAYOUT_DEBOUNCE_SEC
+    _LAYOUT_REQUEST_AT = now
+    if in_burst:
+        await asyncio.sleep(LAYOUT_DEBOUNCE_SEC)
+        if seq != _LAYOUT_REQUEST_SEQ:
+            return JSONResponse({**response, "status": "superseded", "message": "Superseded by a newer layout request"})
+
+    # Same layout already streaming: nothing to restart
+    with CURRENT_LAYOUT_LOCK:
+        unchanged = CURRENT_LAYOUT == config_dict
+    if unchanged and MODE == "live" and PROC and PROC.poll() is None:
+        return JSONResponse({**response, "message": f"Layout '{config.layout}' already active"})
 
     # Start the stream - optimistic restart for speed
-    try:
+    def swap_process(cmd):
+        global PROC, MODE, CUR_LAYOUT, CUR_INPUTS, CUR_AUDIO_INDEX, CUR_CUSTOM_SLOTS, CUR_IN1, CUR_IN2, LAST_HIT_NS, CURRENT_LAYOUT, _CURRENT_LAYOUT_JSON, LAST_LAYOUT, _LAST_LAYOUT_JSON
+        # Start new process first; spawning can take a while, so don't hold LOCK for it
+        new_proc = spawn_ffmpeg(cmd)
+
         with LOCK:
-            # Start new process first
-            new_proc = subprocess.Popen(
-                build_layout_cmd(config.layout, input_urls, audio_index, custom_slots_for_ffmpeg, audio_volumes_by_index),
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                bufsize=0
-            )
-
-            # Kill old process immediately (no graceful wait, no cleanup)
-            old_proc = PROC
-            if old_proc and old_proc.poll() is None:
-                try:
-                    old_proc.kill()
-                except:
-                    pass
+            # Overlapping requests can finish spawning out of order; only the
+            # newest may go live, so a stale process is dropped unused
+            if seq != _LAYOUT_REQUEST_SEQ:
+                kill_and_reap(new_proc)
+                return False
 
             # Swap to new process
+            old_proc = PROC
             PROC = new_proc
             MODE = "live"
+            _notify_proc_started()
             # Update new layout globals
             CUR_LAYOUT = config.layout
             CUR_INPUTS = input_urls
             CUR_AUDIO_INDEX = audio_index
             CUR_CUSTOM_SLOTS = custom_slots_for_ffmpeg
-            # Update legacy globals for backward compatibility
+            # Keep /control/swap and status in1/in2 in step
             if len(input_urls) >= 2:
                 CUR_IN1, CUR_IN2 = input_urls[0], input_urls[1]
-                CUR_AUDIO_MODE = audio_index if audio_index in [0, 1] else 0
-            LAST_HIT = time.time()
+            LAST_HIT_NS = time.monotonic_ns()
 
-        # Store current layout config (with slot-based volumes)
-        with CURRENT_LAYOUT_LOCK:
-            config_dict = config.dict()
-            # Store the converted index-based volumes back as slot-based for consistency
-            if not config_dict.get("audio_volumes"):
-                config_dict["audio_volumes"] = {}
-            for i, volume in audio_volumes_by_index.items():
-                if i < len(expected_slots):
-                    config_dict["audio_volumes"][expected_slots[i]] = volume
-            CURRENT_LAYOUT = config_dict
-
-            # Also save to LAST_LAYOUT for cold start persistence
-            with LAST_LAYOUT_LOCK:
-                LAST_LAYOUT = config_dict.copy()
+            # Store current layout config (with slot-based volumes) in the same
+            # critical section, so no reader sees the new PROC with the old layout
+            with CURRENT_LAYOUT_LOCK:
+                CURRENT_LAYOUT = config_dict
+                _CURRENT_LAYOUT_JSON = None
 
-        return {
-            "status": "success",
-            "message": f"Layout '{config.layout}' started with {len(input_urls)} streams",
-            "audio_source": config.audio_source,
-            "streams": {slot: name for slot, name in zip(expected_slots, channel_names)},
-            "audio_volumes": audio_volumes_by_index,
-        }
+                # Also save to LAST_LAYOUT for cold start persistence
+                with LAST_LAYOUT_LOCK:
+                    LAST_LAYOUT = config_dict.copy()
+                    _LAST_LAYOUT_JSON = None
+
+        # Kill old process immediately (no graceful wait, no cleanup)
+        if old_proc and old_proc.poll() is None:
+            kill_and_reap(old_proc)
+        return True
+
+    try:
+        # Build the command before taking LOCK; spawning and LOCK waits block, so keep them off the event loop
+        cmd = build_layout_cmd(config.layout, input_urls, audio_index, custom_slots_for_ffmpeg, audio_volumes_by_index)
+        if not await asyncio.to_thread(swap_process, cmd):
+            return JSONResponse({**response, "status": "superseded", "message": "Superseded by a newer layout request"})
+
+        return JSONResponse(response)
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        log.exception("Failed to start layout %s", config.layout)
         raise HTTPException(status_code=500, detail=f"Failed to start layout: {str(e)}")
 
 @app.get("/api/layout/current")
 async def get_current_layout():
     """Get current layout configuration."""
+    global _CURRENT_LAYOUT_JSON
     with CURRENT_LAYOUT_LOCK:
         if CURRENT_LAYOUT is None:
-            return {"layout": None, "message": "No layout is currently active"}
-        return CURRENT_LAYOUT
+            return Response(_NO_LAYOUT_JSON, media_type="application/json")
+        # Encoded once per layout change; every writer clears it
+        if _CURRENT_LAYOUT_JSON is None:
+            _CURRENT_LAYOUT_JSON = encode_layout(CURRENT_LAYOUT)
+        return Response(_CURRENT_LAYOUT_JSON, media_type="application/json")
 
 # ========== Audio Control API ==========
 
@@ -1536,7 +2094,8 @@ class VolumeControlModel(BaseModel):
 async def set_audio_volume(control: VolumeControlModel):
     """
     Set volume for a specific slot in the current layout.
-    Applies change via smart restart (1-2 second interruption).
+    Applied live over ZMQ when possible, otherwise via smart restart
+    (1-2 second interruption).
 
     Args:
         slot_id: Slot identifier (e.g., 'main', 'inset', 'left', 'right')
@@ -1545,7 +2104,7 @@ async def set_audio_volume(control: VolumeControlModel):
     Returns:
         Status and updated volume information
     """
-    global MODE, PROC, LAST_HIT, CUR_LAYOUT, CUR_INPUTS, CUR_AUDIO_INDEX, CUR_CUSTOM_SLOTS
+    global MODE, PROC, LAST_HIT_NS, CUR_LAYOUT, CUR_INPUTS, CUR_AUDIO_INDEX, CUR_CUSTOM_SLOTS, _CURRENT_LAYOUT_JSON, _LAST_LAYOUT_JSON, _VOLUME_REQUEST_SEQ
 
     # Validate volume range
     if not 0.0 <= control.volume <= 1.0:
@@ -1562,87 +2121,118 @@ async def set_audio_volume(control: VolumeControlModel):
         if control.slot_id not in streams:
             raise HTTPException(status_code=404, detail=f"Slot '{control.slot_id}' not found in current layout")
 
-        # Get expected slots for the layout
-        if layout_type == 'custom':
-            # For custom layouts, get slots from the custom_slots config
-            custom_slots = CURRENT_LAYOUT.get("custom_slots", [])
-            if custom_slots:
-                # Sort by size (same order as used in set_layout)
-                sorted_slots = sorted(custom_slots, key=lambda s: s['width'] * s['height'], reverse=True)
-                expected_slots = [slot['id'] for slot in sorted_slots]
-            else:
-                raise HTTPException(status_code=400, detail="Custom layout missing slot definitions")
-        else:
-            expected_slots = get_expected_slots_for_layout(layout_type)
+        # Slot -> input index for the layout (same order as used in set_layout)
+        custom_slots = CURRENT_LAYOUT.get("custom_slots")
+        if layout_type == 'custom' and not custom_slots:
+            raise HTTPException(status_code=400, detail="Custom layout missing slot definitions")
+        slot_index = layout_slot_index(layout_type, custom_slots)
 
-        if control.slot_id not in expected_slots:
+        if control.slot_id not in slot_index:
             raise HTTPException(status_code=404, detail=f"Slot '{control.slot_id}' is not valid for layout '{layout_type}'")
 
+        # Re-sent value (e.g. the UI re-posting on focus change): nothing to apply
+        previous = (CURRENT_LAYOUT.get("audio_volumes") or {}).get(control.slot_id)
+        if previous is not None and abs(previous - control.volume) < 1e-4:
+            return {
+                "status": "success",
+                "slot_id": control.slot_id,
+                "volume": control.volume,
+                "stream_index": slot_index[control.slot_id],
+                "message": "Volume unchanged"
+            }
+
         # Update stored volume in layout config
         if "audio_volumes" not in CURRENT_LAYOUT:
             CURRENT_LAYOUT["audio_volumes"] = {}
         CURRENT_LAYOUT["audio_volumes"][control.slot_id] = control.volume
+        _CURRENT_LAYOUT_JSON = None
 
         # Also update LAST_LAYOUT for cold start persistence
         with LAST_LAYOUT_LOCK:
+            # LAST_LAYOUT may share the audio_volumes dict with CURRENT_LAYOUT
+            _LAST_LAYOUT_JSON = None
             if LAST_LAYOUT:
                 if "audio_volumes" not in LAST_LAYOUT:
                     LAST_LAYOUT["audio_volumes"] = {}
                 LAST_LAYOUT["audio_volumes"][control.slot_id] = control.volume
 
         # Find the stream index for this slot
-        stream_index = expected_slots.index(control.slot_id)
+        stream_index = slot_index[control.slot_id]
 
-    # Convert slot-based volumes to index-based for FFmpeg
-    audio_volumes_by_index = {}
-    with CURRENT_LAYOUT_LOCK:
-        # Get expected slots again (outside the lock we had it, but need it here too)
-        layout_type = CURRENT_LAYOUT.get("layout")
-        if layout_type == 'custom':
-            custom_slots = CURRENT_LAYOUT.get("custom_slots", [])
-            if custom_slots:
-                sorted_slots = sorted(custom_slots, key=lambda s: s['width'] * s['height'], reverse=True)
-                expected_slots_for_index = [slot['id'] for slot in sorted_slots]
-            else:
-                expected_slots_for_index = expected_slots
-        else:
-            expected_slots_for_index = expected_slots
+        # Convert slot-based volumes to index-based for FFmpeg
+        audio_volumes_by_index = slot_vols_to_index(CURRENT_LAYOUT["audio_volumes"], slot_index)
 
-        for slot_id, volume in CURRENT_LAYOUT.get("audio_volumes", {}).items():
-            if slot_id in expected_slots_for_index:
-                idx = expected_slots_for_index.index(slot_id)
-                audio_volumes_by_index[idx] = volume
+    # Retarget the running FFmpeg's volume filter; restart only if that fails
+    if USE_LIVE_VOLUME:
+        with LOCK:
+            live_proc = PROC if MODE == "live" and PROC and PROC.poll() is None else None
+        if live_proc and await asyncio.to_thread(audio_controller.set_volume, stream_index, control.volume):
+            return {
+                "status": "success",
+                "slot_id": control.slot_id,
+                "volume": control.volume,
+                "stream_index": stream_index,
+                "message": "Volume updated (live)"
+            }
+
+    # Coalesce slider drags: the stored volumes are already updated, so only
+    # the latest request in the window restarts FFmpeg, with all of them
+    _VOLUME_REQUEST_SEQ += 1
+    seq = _VOLUME_REQUEST_SEQ
+    if LAYOUT_DEBOUNCE_SEC > 0:
+        await asyncio.sleep(LAYOUT_DEBOUNCE_SEC)
+        if seq != _VOLUME_REQUEST_SEQ:
+            return {
+                "status": "success",
+                "slot_id": control.slot_id,
+                "volume": control.volume,
+                "stream_index": stream_index,
+                "message": "Volume updated (applied with a newer change)"
+            }
+        # Re-read the volumes in case the layout changed while waiting
+        with CURRENT_LAYOUT_LOCK:
+            if CURRENT_LAYOUT:
+                audio_volumes_by_index = slot_vols_to_index(
+                    CURRENT_LAYOUT.get("audio_volumes", {}),
+                    layout_slot_index(CURRENT_LAYOUT.get("layout"), CURRENT_LAYOUT.get("custom_slots")),
+                )
 
     # Restart FFmpeg with new volumes (smart restart for minimal interruption)
-    try:
+    def restart_with_volumes():
+        global PROC, LAST_HIT_NS
+        # Snapshot what is streaming; spawning can take a while, so don't hold LOCK for it
         with LOCK:
             if MODE != "live" or not CUR_LAYOUT or not CUR_INPUTS:
-                return {
-                    "status": "success",
-                    "slot_id": control.slot_id,
-                    "volume": control.volume,
-                    "message": "Volume updated in state (stream not active)"
-                }
-
-            # Start new process with updated volumes
-            new_proc = subprocess.Popen(
-                build_layout_cmd(CUR_LAYOUT, CUR_INPUTS, CUR_AUDIO_INDEX, CUR_CUSTOM_SLOTS, audio_volumes_by_index),
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                bufsize=0
-            )
-
-            # Kill old process immediately
-            old_proc = PROC
-            if old_proc and old_proc.poll() is None:
-                try:
-                    old_proc.kill()
-                except:
-                    pass
+                return False
+            running = (CUR_LAYOUT, CUR_INPUTS, CUR_AUDIO_INDEX, CUR_CUSTOM_SLOTS)
 
-            # Swap to new process
-            PROC = new_proc
-            LAST_HIT = time.time()
+        # Start new process with updated volumes
+        new_proc = spawn_ffmpeg(build_layout_cmd(*running, audio_volumes_by_index))
+
+        with LOCK:
+            if MODE != "live" or (CUR_LAYOUT, CUR_INPUTS, CUR_AUDIO_INDEX, CUR_CUSTOM_SLOTS) != running:
+                # A layout change or stop got in first; its state stands
+                old_proc = new_proc
+            else:
+                # Swap to new process
+                old_proc = PROC
+                PROC = new_proc
+                _notify_proc_started()
+                LAST_HIT_NS = time.monotonic_ns()
+
+        # Kill old process immediately
+        if old_proc and old_proc.poll() is None:
+            kill_and_reap(old_proc)
+        return True
+
+    try:
+        if not await asyncio.to_thread(restart_with_volumes):
+            return {
+                "status": "success",
+                "slot_id": control.slot_id,
+                "volume": control.volume,
+                "message": "Volume updated in state (stream not active)"
+            }
 
         return {
             "status": "success",
@@ -1652,19 +2242,38 @@ async def set_audio_volume(control: VolumeControlModel):
             "message": "Volume updated (stream restarted)"
         }
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        log.exception("Failed to apply volume change for slot %s", control.slot_id)
+        # Put back the volume that is actually playing, unless a newer change
+        # replaced ours, so a retry with the same value isn't seen as a no-op
+        with CURRENT_LAYOUT_LOCK, LAST_LAYOUT_LOCK:
+            for layout in (CURRENT_LAYOUT, LAST_LAYOUT):
+                volumes = layout.get("audio_volumes") if layout else None
+                if volumes is not None and volumes.get(control.slot_id) == control.volume:
+                    if previous is None:
+                        volumes.pop(control.slot_id, None)
+                    else:
+                        volumes[control.slot_id] = previous
+            _CURRENT_LAYOUT_JSON = None
+            _LAST_LAYOUT_JSON = None
         raise HTTPException(status_code=500, detail=f"Failed to apply volume change: {str(e)}")
 
 @app.get("/api/audio/volumes")
 async def get_audio_volumes():
     """Get current volume levels for all slots in the active layout."""
+    global _CURRENT_LAYOUT_JSON, _AUDIO_VOLUMES_CACHE
     with CURRENT_LAYOUT_LOCK:
         if not CURRENT_LAYOUT:
-            return {"volumes": {}, "message": "No layout is currently active"}
-
-        return {
-            "volumes": CURRENT_LAYOUT.get("audio_volumes", {}),
-            "layout": CURRENT_LAYOUT.get("layout"),
-            "streams": CURRENT_LAYOUT.get("streams", {}),
-        }
+            return Response(_NO_VOLUMES_JSON, media_type="application/json")
+
+        # Rebuilt only when the layout or its volumes changed since the last poll
+        if _CURRENT_LAYOUT_JSON is None:
+            _CURRENT_LAYOUT_JSON = encode_layout(CURRENT_LAYOUT)
+        source, body = _AUDIO_VOLUMES_CACHE
+        if source is not _CURRENT_LAYOUT_JSON:
+            body = encode_layout({
+                "volumes": CURRENT_LAYOUT.get("audio_volumes") or {},
+                "layout": CURRENT_LAYOUT.get("layout"),
+                "streams": CURRENT_LAYOUT.get("streams", {}),
+            })
+            _AUDIO_VOLUMES_CACHE = (_CURRENT_LAYOUT_JSON, body)
+        return Response(body, media_type="application/json")